@@ -0,0 +1,165 @@
+import argparse
+import json
+import random
+import sys
+from array import array
+from collections import Counter
+
+import degrees
+from graph import INDEX
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Graph-wide statistics for the degrees co-star graph, written as JSON.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--hub", metavar="NAME", action="append", default=[],
+                        help="measure separation from this person "
+                             "(repeat for distance to the nearest of several)")
+    parser.add_argument("--samples", type=int, default=10,
+                        help="number of people to sample eccentricity for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="FILE",
+                        help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    hubs = []
+    for name in args.hub:
+        person_id = degrees.person_id_for_name(name, interactive=False, fuzzy=True)
+        if person_id is None:
+            sys.exit(f"Person not found or ambiguous: {name}")
+        hubs.append(person_id)
+
+    results = analyse(degrees.graph, hubs, args.samples, random.Random(args.seed))
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def analyse(graph, hubs, samples, rng):
+    """
+    Returns a JSON-ready dict of degree distributions, connected components,
+    separation from the hub people and sampled eccentricities.
+    """
+    results = {
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "movies_per_person": histogram(
+            graph.person_offsets[p + 1] - graph.person_offsets[p]
+            for p in range(len(graph.person_ids))
+        ),
+        "co_stars_per_person": histogram(co_star_degrees(graph)),
+    }
+
+    component = components(graph)
+    sizes = Counter(component)
+    results["components"] = {
+        "count": len(sizes),
+        "largest": max(sizes.values(), default=0),
+        "sizes": histogram(sizes.values()),
+    }
+
+    if hubs:
+        sources = [graph.person_index[person_id] for person_id in hubs]
+        distance = distances(graph, sources)
+        results["separation"] = {
+            "hubs": hubs,
+            "histogram": histogram(d for d in distance if d != -1),
+            "unreachable": sum(1 for d in distance if d == -1),
+        }
+
+    # Sample eccentricity within the largest component, where it is most telling
+    largest = sizes.most_common(1)[0][0] if sizes else None
+    members = [p for p, root in enumerate(component) if root == largest]
+    results["eccentricity_samples"] = [
+        {"person_id": graph.person_ids[p],
+         "eccentricity": max(distances(graph, [p]))}
+        for p in rng.sample(members, min(samples, len(members)))
+    ]
+    return results
+
+
+def co_star_degrees(graph):
+    """
+    Yields the number of distinct co-stars of each person.
+    """
+    for person in range(len(graph.person_ids)):
+        co_stars = set()
+        for movie in graph.movies_of(person):
+            co_stars.update(graph.stars_of(movie))
+        co_stars.discard(person)
+        yield len(co_stars)
+
+
+def components(graph):
+    """
+    Labels each person with the root of their connected component,
+    using union-find over the stars of each movie.
+    """
+    parent = array(INDEX, range(len(graph.person_ids)))
+
+    def find(x):
+        # Path halving keeps the trees shallow without recursion
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for movie in range(len(graph.movie_ids)):
+        stars = graph.stars_of(movie)
+        if len(stars) < 2:
+            continue
+        root = find(stars[0])
+        for star in stars[1:]:
+            other = find(star)
+            if other != root:
+                parent[other] = root
+
+    return [find(p) for p in range(len(graph.person_ids))]
+
+
+def distances(graph, sources):
+    """
+    Multi-source BFS: returns each person's degrees of separation from the
+    nearest source, or -1 if unreachable. Each movie's cast is scanned once.
+    """
+    distance = array(INDEX, [-1]) * len(graph.person_ids)
+    movie_seen = bytearray(len(graph.movie_ids))
+    for source in sources:
+        distance[source] = 0
+    layer = list(set(sources))
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+                for neighbor in graph.stars_of(movie):
+                    if distance[neighbor] == -1:
+                        distance[neighbor] = depth
+                        next_layer.append(neighbor)
+        layer = next_layer
+    return distance
+
+
+def histogram(values):
+    """
+    Returns a {value: count} dict with keys in ascending order.
+    """
+    counts = Counter(values)
+    return {str(value): counts[value] for value in sorted(counts)}
+
+
+if __name__ == "__main__":
+    main()
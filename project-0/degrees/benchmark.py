@@ -0,0 +1,251 @@
+import argparse
+import random
+import time
+import tracemalloc
+from array import array
+
+import degrees
+from graph import CoStarGraph, INDEX
+from util import (Node, StackFrontier, QueueFrontier,
+                  IndexedStackFrontier, IndexedQueueFrontier)
+
+FRONTIERS = [
+    ("StackFrontier", StackFrontier),
+    ("QueueFrontier", QueueFrontier),
+    ("IndexedStackFrontier", IndexedStackFrontier),
+    ("IndexedQueueFrontier", IndexedQueueFrontier),
+]
+
+
+def frontier_benchmark(size, samples=1000):
+    """
+    Fills each frontier with `size` nodes, then times `samples` membership
+    checks and `samples` removals against the full frontier.
+
+    Returns a list of (name, contains_state µs/op, remove µs/op).
+    """
+    results = []
+    for name, frontier_class in FRONTIERS:
+        frontier = frontier_class()
+        for state in range(size):
+            frontier.add(Node(state=state, parent=None, action=None))
+
+        # Look for states that are not in the frontier, the worst case for a scan
+        start = time.perf_counter()
+        for state in range(size, size + samples):
+            frontier.contains_state(state)
+        contains = (time.perf_counter() - start) / samples
+
+        start = time.perf_counter()
+        for _ in range(samples):
+            frontier.remove()
+        remove = (time.perf_counter() - start) / samples
+
+        results.append((name, contains * 1e6, remove * 1e6))
+    return results
+
+
+class CountingGraph(CoStarGraph):
+    """
+    CoStarGraph that counts how many people each search expands.
+    """
+
+    expanded = 0
+
+    def neighbors(self, person):
+        self.expanded += 1
+        return super().neighbors(person)
+
+    def movies_of(self, person):
+        self.expanded += 1
+        return super().movies_of(person)
+
+
+def synthetic_graph(people, movies, cast, distribution, rng):
+    """
+    Generates a random co-star graph. Each movie gets between 1 and
+    2 * cast - 1 stars, picked uniformly or, for "zipf", weighted so a few
+    people star in a great many movies as in real casting data.
+    """
+    population = range(people)
+    if distribution == "zipf":
+        weights = [1 / (rank + 1) for rank in population]
+        cumulative = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+    else:
+        cumulative = None
+
+    edge_people = array(INDEX)
+    edge_movies = array(INDEX)
+    for movie in range(movies):
+        size = rng.randint(1, 2 * cast - 1)
+        stars = set(rng.choices(population, cum_weights=cumulative, k=size))
+        for person in stars:
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    # Shuffle ids so popularity is not correlated with index order
+    person_ids = [str(i) for i in population]
+    rng.shuffle(person_ids)
+    movie_ids = [f"m{i}" for i in range(movies)]
+    graph = CoStarGraph.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+    return CountingGraph(graph.person_ids, graph.movie_ids,
+                         graph.person_offsets, graph.person_movies,
+                         graph.movie_offsets, graph.movie_stars)
+
+
+def legacy_search(source, target):
+    """
+    The original shortest_path: a DFS and a BFS with list-backed frontiers,
+    keeping the shorter result.
+    """
+    if source == target:
+        return []
+    stack_path = degrees.solve(source, target, StackFrontier())
+    queue_path = degrees.solve(source, target, QueueFrontier())
+    if stack_path is None or queue_path is None:
+        return None
+    return queue_path if len(stack_path) > len(queue_path) else stack_path
+
+
+def bfs_search(source, target):
+    if source == target:
+        return []
+    return degrees.solve(source, target, IndexedQueueFrontier())
+
+
+def dfs_search(source, target):
+    if source == target:
+        return []
+    return degrees.solve(source, target, IndexedStackFrontier())
+
+
+def tree_search(source, target):
+    """
+    Builds (or reuses) the source's distance tree, then walks it.
+    """
+    degrees.distance_tree(source)
+    return degrees.shortest_path(source, target)
+
+
+STRATEGIES = {
+    "legacy": legacy_search,
+    "dfs": dfs_search,
+    "bfs": bfs_search,
+    "bidirectional": degrees.bidirectional_search,
+    "tree": tree_search,
+}
+
+
+def search_benchmark(graph, queries, strategies):
+    """
+    Runs every query with each strategy against the graph, returning a list
+    of result dicts: nodes expanded, wall time, peak traced memory, and how
+    many paths were valid and as short as the BFS reference.
+    """
+    degrees.graph = graph
+    degrees.distance_cache.clear()
+    reference = [bfs_search(source, target) for source, target in queries]
+
+    results = []
+    for name in strategies:
+        search = STRATEGIES[name]
+
+        # Time without tracing, since tracemalloc slows allocation down
+        degrees.distance_cache.clear()
+        graph.expanded = 0
+        start = time.perf_counter()
+        paths = [search(source, target) for source, target in queries]
+        seconds = time.perf_counter() - start
+        expanded = graph.expanded
+
+        # Repeat with tracing for peak memory
+        degrees.distance_cache.clear()
+        tracemalloc.start()
+        for source, target in queries:
+            search(source, target)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        optimal = sum(
+            valid_path(graph, source, target, path)
+            and (path is None) == (best is None)
+            and (path is None or len(path) == len(best))
+            for (source, target), path, best in zip(queries, paths, reference)
+        )
+        results.append({
+            "strategy": name,
+            "expanded": expanded,
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "optimal": optimal,
+            "queries": len(queries),
+        })
+    degrees.distance_cache.clear()
+    return results
+
+
+def valid_path(graph, source, target, path):
+    """
+    Checks that each step of a path is a real co-star link ending at target.
+    """
+    if path is None:
+        return True
+    person = graph.person_index[source]
+    for movie_id, person_id in path:
+        movie = graph.movie_index[movie_id]
+        if person not in graph.stars_of(movie):
+            return False
+        person = graph.person_index[person_id]
+        if person not in graph.stars_of(movie):
+            return False
+    return graph.person_ids[person] == target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the degrees search engine.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    frontier = commands.add_parser("frontier", help="time frontier operations")
+    frontier.add_argument("size", nargs="?", type=int, default=100000)
+
+    search = commands.add_parser("search", help="compare search strategies on a synthetic graph")
+    search.add_argument("--people", type=int, default=20000)
+    search.add_argument("--movies", type=int, default=10000)
+    search.add_argument("--cast", type=int, default=4, help="mean stars per movie")
+    search.add_argument("--distribution", choices=["uniform", "zipf"], default="zipf")
+    search.add_argument("--queries", type=int, default=50)
+    search.add_argument("--sources", type=int, default=5,
+                        help="distinct source people the queries are drawn from")
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--strategies", nargs="+", choices=list(STRATEGIES),
+                        default=["dfs", "bfs", "bidirectional", "tree"])
+    args = parser.parse_args()
+
+    if args.command == "frontier":
+        print(f"Frontier of {args.size} nodes")
+        print(f"{'frontier':<22}{'contains_state':>18}{'remove':>14}")
+        for name, contains, remove in frontier_benchmark(args.size):
+            print(f"{name:<22}{contains:>15.2f} µs{remove:>11.2f} µs")
+        return
+
+    rng = random.Random(args.seed)
+    graph = synthetic_graph(args.people, args.movies, args.cast, args.distribution, rng)
+    sources = rng.sample(graph.person_ids, args.sources)
+    queries = [(rng.choice(sources), rng.choice(graph.person_ids)) for _ in range(args.queries)]
+
+    print(f"{args.people} people, {args.movies} movies, {args.distribution} casting, "
+          f"{args.queries} queries from {args.sources} sources (seed {args.seed})")
+    print(f"{'strategy':<15}{'expanded':>12}{'time':>12}{'peak memory':>14}{'optimal':>10}")
+    for result in search_benchmark(graph, queries, args.strategies):
+        print(f"{result['strategy']:<15}{result['expanded']:>12}"
+              f"{result['seconds']:>10.3f} s"
+              f"{result['peak_bytes'] / 1024:>11.0f} KB"
+              f"{result['optimal']:>6}/{result['queries']}")
+
+
+if __name__ == "__main__":
+    main()
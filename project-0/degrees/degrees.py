@@ -1,55 +1,139 @@
-import csv
+import os
 import sys
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+from distances import DistanceTree, TreeCache
+from graph import CoStarGraph, INDEX
+from nameindex import NameIndex
+from snapshot import load_snapshot, write_snapshot
+from stream import LazyDetails, read_chunks
+from util import Node
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# Name of each person, by graph index
+person_names = []
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# Prefix and fuzzy index over the lowercase names, built by load_data
+name_index = None
+
+# Display-only fields, read from the CSV files on demand:
+# people.csv birth, and movies.csv title and year
+person_details = None
+movie_details = None
+
+# Counts of rows skipped while loading, by reason
+dropped = {}
+
+# Integer-indexed person-movie graph, built by load_data
+graph = None
+
+# Single-source distance trees, keyed by source person index
+distance_cache = TreeCache()
 
 
 def load_data(directory):
     """
-    Load data from CSV files into memory.
+    Load data into memory, from the binary snapshot if it is up to date,
+    otherwise from the CSV files (writing a fresh snapshot for next time).
+    """
+    global graph, name_index, person_details, movie_details
+
+    # Trees for a previously loaded graph are no longer valid
+    distance_cache.clear()
+
+    person_details = LazyDetails(os.path.join(directory, "people.csv"), ["birth"])
+    movie_details = LazyDetails(os.path.join(directory, "movies.csv"), ["title", "year"])
+
+    snapshot = load_snapshot(directory)
+    if snapshot is None:
+        load_csv(directory)
+        name_index = NameIndex.build(names)
+        try:
+            write_snapshot(directory, graph, person_names, name_index, dropped)
+        except OSError:
+            pass
+        return
+
+    graph, loaded_names, name_index, loaded_dropped = snapshot
+    person_names[:] = loaded_names
+    dropped.clear()
+    dropped.update(loaded_dropped)
+    names.clear()
+    for person_id, name in zip(graph.person_ids, person_names):
+        names.setdefault(name.lower(), set()).add(person_id)
+
+
+def load_csv(directory):
+    """
+    Stream the CSV files into memory a chunk at a time, keeping only ids,
+    names and the star links. Rows that cannot be used are counted in dropped.
     """
+    global graph
+
+    # IMDB ids in the order they are interned as graph indices
+    person_ids = []
+    movie_ids = []
+    person_index = {}
+    movie_index = {}
+
+    names.clear()
+    person_names.clear()
+    dropped.clear()
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    for chunk in read_chunks(os.path.join(directory, "people.csv"), ["id", "name"], dropped):
+        for person_id, name in chunk:
+            if person_id in person_index:
+                dropped["duplicate people"] = dropped.get("duplicate people", 0) + 1
+                continue
+            # Interning shares one string between everyone with the same name
+            name = sys.intern(name)
+            person_id = sys.intern(person_id)
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            person_names.append(name)
+            names.setdefault(name.lower(), set()).add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    for chunk in read_chunks(os.path.join(directory, "movies.csv"), ["id"], dropped):
+        for movie_id, in chunk:
+            if movie_id in movie_index:
+                dropped["duplicate movies"] = dropped.get("duplicate movies", 0) + 1
+                continue
+            movie_id = sys.intern(movie_id)
+            movie_index[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+
+    # Load stars as parallel arrays of (person, movie) indices
+    edge_people = array(INDEX)
+    edge_movies = array(INDEX)
+    for chunk in read_chunks(os.path.join(directory, "stars.csv"), ["person_id", "movie_id"], dropped):
+        for person_id, movie_id in chunk:
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is None or movie is None:
+                dropped["unknown stars"] = dropped.get("unknown stars", 0) + 1
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+    graph = CoStarGraph.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+
+
+def person_name(person_id):
+    """
+    Returns a person's name.
+    """
+    return person_names[graph.person_index[person_id]]
+
+
+def movie_title(movie_id):
+    """
+    Returns a movie's title.
+    """
+    return movie_details.get(movie_id, "title")
 
 
 def main():
@@ -61,11 +145,13 @@ def main():
     print("Loading data...")
     load_data(directory)
     print("Data loaded.")
+    for reason, count in dropped.items():
+        print(f"Skipped {count} rows: {reason}.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), fuzzy=True)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), fuzzy=True)
     if target is None:
         sys.exit("Person not found.")
 
@@ -77,10 +163,12 @@ def main():
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
+        # Read all the titles needed in one pass over movies.csv
+        movie_details.fetch([movie_id for movie_id, _ in path[1:]])
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -92,21 +180,118 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
 
+    # Answer from a cached distance tree if either end has one
+    for tree, forwards in ((distance_cache.get(graph.person_index[source]), True),
+                           (distance_cache.get(graph.person_index[target]), False)):
+        if tree is None:
+            continue
+        if forwards:
+            path = tree.path_from_source(graph.person_index[target])
+        else:
+            path = tree.path_to_source(graph.person_index[source])
+        if path is None:
+            return None
+        return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
+
+    return bidirectional_search(source, target)
+
+
+def distance_tree(source):
+    """
+    Computes the distance tree from a person to everyone reachable and keeps
+    it in the distance cache, so shortest_path to or from that person only
+    has to walk parent pointers.
+    """
+    index = graph.person_index[source]
+    tree = distance_cache.get(index)
+    if tree is None:
+        tree = DistanceTree(graph, index)
+        distance_cache.put(tree)
+    return tree
+
+
+def bidirectional_search(source, target):
+    """
+    Breadth-first search grown from both the source and the target at once.
+
+    Each side keeps a map of reached people to the (person, movie) step that
+    reached them. The smaller frontier is expanded one whole layer at a time
+    and the search stops as soon as a layer touches a person already reached
+    by the other side, so only around the square root of the nodes a one-sided
+    search would visit are ever expanded.
+    """
+
     if source == target:
         return []
 
-    # Try stack frontier
-    stack_path = solve(source, target, StackFrontier())
+    # Search over graph indices, converting back to IMDB ids for the path
+    source = graph.person_index[source]
+    target = graph.person_index[target]
 
-    # Try queue frontier
-    queue_path = solve(source, target, QueueFrontier())
+    # Maps person -> (previous person, movie) for each side
+    forward = {source: None}
+    backward = {target: None}
 
-    if not stack_path == None and not queue_path == None:
-        shortest_path = queue_path if len(stack_path) > len(queue_path) else stack_path
-    else:
-        shortest_path = None
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # If either side runs out of people to expand, the two are not connected
+    while forward_frontier and backward_frontier:
+
+        # Always expand the cheaper side
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meet = expand_layer(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meet = expand_layer(backward_frontier, backward, forward)
+
+        if meet is not None:
+            return join_paths(meet, forward, backward)
 
-    return shortest_path
+    return None
+
+
+def expand_layer(frontier, reached, other):
+    """
+    Expands every person in one BFS layer, recording how each new person was
+    reached. Returns the next layer and the first person also reached by the
+    other side (or None if the sides have not met yet).
+    """
+    next_frontier = []
+    for person in frontier:
+        for movie, neighbor in graph.neighbors(person):
+            if neighbor in reached:
+                continue
+            reached[neighbor] = (person, movie)
+            # Every meeting found in this layer gives a path of the same length
+            if neighbor in other:
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def join_paths(meet, forward, backward):
+    """
+    Builds the (movie_id, person_id) path through the person where the
+    forward and backward searches met.
+    """
+
+    # Walk back from the meeting point to the source
+    path = []
+    person = meet
+    while forward[person] is not None:
+        previous, movie = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    person = meet
+    while backward[person] is not None:
+        following, movie = backward[person]
+        path.append((movie, following))
+        person = following
+
+    return [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path]
 
 
 def solve(source, target, frontier):
@@ -114,6 +299,11 @@ def solve(source, target, frontier):
     Implements the search function using the provided frontier object
     """
 
+    # Search over graph indices, converting back to IMDB ids for the path
+    target_id = target
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+
     # Create starting conditions
     start = Node(state=source, parent=None, action=None)
 
@@ -138,12 +328,12 @@ def solve(source, target, frontier):
 
         # Add neighbors to frontier
         # In this case action refers to to the movie that links the persons
-        for action, state in neighbors_for_person(node.state):
+        for action, state in graph.neighbors(node.state):
             # If neighbour contains the goal state, then we have a solution
             if state == target:
-                path = [(action, state)]
+                path = [(graph.movie_ids[action], target_id)]
                 while node.parent is not None:
-                    path.append((node.action, node.state))
+                    path.append((graph.movie_ids[node.action], graph.person_ids[node.state]))
                     node = node.parent
                 path.reverse()
                 return path
@@ -153,20 +343,35 @@ def solve(source, target, frontier):
                 frontier.add(child)
     
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True, fuzzy=False):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If interactive is False, ambiguous names return None
+    instead of prompting for the intended id.
+
+    If fuzzy is True and no name matches exactly, the closest
+    name within two edits is used, provided it is the only one
+    at that distance.
     """
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) == 0 and fuzzy:
+        matches = name_index.fuzzy(name, limit=2)
+        if len(matches) == 1 or (len(matches) == 2 and matches[0][0] < matches[1][0]):
+            person_ids = list(names[matches[0][1]])
+            if interactive:
+                print(f"Using closest match '{person_name(person_ids[0])}'")
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
+        details = person_details.fetch(person_ids)
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = details[person_id]["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -184,12 +389,10 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return {
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in graph.neighbors(graph.person_index[person_id])
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+from array import array
+from collections import OrderedDict
+
+from graph import INDEX
+
+# Default memory budget for cached distance trees
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+class DistanceTree():
+    """
+    Breadth-first search tree from one person to everyone reachable.
+
+    For each person index, parent_person and parent_movie give the step back
+    towards the source (-1 if unreached or the source itself) and distance
+    gives the degrees of separation (-1 if unreached).
+    """
+
+    def __init__(self, graph, source):
+        self.source = source
+        size = len(graph.person_ids)
+        self.parent_person = array(INDEX, [-1]) * size
+        self.parent_movie = array(INDEX, [-1]) * size
+        self.distance = array(INDEX, [-1]) * size
+
+        # Each movie's cast only needs scanning the first time it is reached
+        movie_seen = bytearray(len(graph.movie_ids))
+
+        self.distance[source] = 0
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for movie in graph.movies_of(person):
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for neighbor in graph.stars_of(movie):
+                        if self.distance[neighbor] == -1:
+                            self.distance[neighbor] = depth
+                            self.parent_person[neighbor] = person
+                            self.parent_movie[neighbor] = movie
+                            next_layer.append(neighbor)
+            layer = next_layer
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the tree's arrays.
+        """
+        return sum(a.itemsize * len(a)
+                   for a in (self.parent_person, self.parent_movie, self.distance))
+
+    def path_to_source(self, person):
+        """
+        Returns the (movie, person) index steps that lead from `person` back
+        to the source, or None if they are not connected.
+        """
+        if self.distance[person] == -1:
+            return None
+        path = []
+        while person != self.source:
+            movie = self.parent_movie[person]
+            person = self.parent_person[person]
+            path.append((movie, person))
+        return path
+
+    def path_from_source(self, person):
+        """
+        Returns the (movie, person) index steps that lead from the source to
+        `person`, or None if they are not connected.
+        """
+        if self.distance[person] == -1:
+            return None
+        path = []
+        while person != self.source:
+            path.append((self.parent_movie[person], person))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of DistanceTrees, keyed by source person index,
+    that evicts old trees to stay within a memory budget in bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.trees = OrderedDict()
+
+    def __contains__(self, source):
+        return source in self.trees
+
+    def __len__(self):
+        return len(self.trees)
+
+    def get(self, source):
+        """
+        Returns the cached tree for a source, or None, marking it recently used.
+        """
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.trees.move_to_end(source)
+        return tree
+
+    def put(self, tree):
+        """
+        Adds a tree, evicting the least recently used trees until it fits.
+        Trees larger than the whole budget are not cached.
+        """
+        if tree.nbytes > self.max_bytes:
+            return
+        if tree.source in self.trees:
+            self.nbytes -= self.trees.pop(tree.source).nbytes
+        while self.trees and self.nbytes + tree.nbytes > self.max_bytes:
+            _, evicted = self.trees.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+        self.trees[tree.source] = tree
+        self.nbytes += tree.nbytes
+
+    def clear(self):
+        self.trees.clear()
+        self.nbytes = 0
@@ -0,0 +1,86 @@
+from array import array
+
+# Typecode for the index arrays: 32-bit signed ints, enough for IMDb-sized data
+INDEX = "i"
+
+
+class CoStarGraph():
+    """
+    Person-movie bipartite graph stored in compressed sparse row (CSR) form.
+
+    People and movies are interned to dense integers 0..n-1. The movies of
+    person p are person_movies[person_offsets[p]:person_offsets[p + 1]] and
+    the stars of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_stars):
+        # Index -> IMDB id, and IMDB id -> index
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edge_people, edge_movies):
+        """
+        Builds the graph from parallel arrays of (person, movie) index pairs.
+        """
+        person_offsets, person_movies = csr(len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_stars = csr(len(movie_ids), edge_movies, edge_people)
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person starred in.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices who starred in a movie.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for everyone who starred with a
+        given person, including the person themselves.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+
+def csr(size, rows, columns):
+    """
+    Counting-sorts parallel (row, column) arrays into CSR offsets and
+    neighbors for rows 0..size-1.
+    """
+
+    # offsets[r + 1] - offsets[r] is the number of entries in row r
+    offsets = array(INDEX, bytes(array(INDEX).itemsize * (size + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(size):
+        offsets[row + 1] += offsets[row]
+
+    # Drop each column into the next free slot of its row
+    neighbors = array(INDEX, bytes(array(INDEX).itemsize * len(rows)))
+    position = offsets[:-1]
+    for row, column in zip(rows, columns):
+        neighbors[position[row]] = column
+        position[row] += 1
+
+    return offsets, neighbors
@@ -0,0 +1,189 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from graph import INDEX, csr
+
+# Length of the n-grams names are indexed by
+GRAM = 3
+
+# Padding so the start and end of a name form their own n-grams
+START = "\x02" * (GRAM - 1)
+END = "\x03"
+
+# Posting lists longer than this are probed by bisection for each fuzzy
+# candidate rather than scanned in full
+LONG_POSTINGS = 5000
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookup over lowercase names.
+
+    Names are kept sorted for prefix search, and each trigram maps to the
+    sorted indices of the names containing it, stored in CSR form
+    (postings[offsets[g]:offsets[g + 1]] for trigram number g).
+    """
+
+    def __init__(self, names, grams, offsets, postings):
+        self.names = names
+        self.grams = {gram: i for i, gram in enumerate(grams)}
+        self.gram_list = grams
+        self.offsets = offsets
+        self.postings = postings
+        self.by_length = None
+
+    @classmethod
+    def build(cls, names):
+        """
+        Builds the index for an iterable of lowercase names.
+        """
+        names = sorted(set(names))
+        grams = {}
+        gram_rows = array(INDEX)
+        name_rows = array(INDEX)
+        for i, name in enumerate(names):
+            for gram in trigrams(name):
+                gram_rows.append(grams.setdefault(gram, len(grams)))
+                name_rows.append(i)
+
+        # Names were visited in order, so each trigram's postings come out sorted
+        offsets, postings = csr(len(grams), gram_rows, name_rows)
+        return cls(names, list(grams), offsets, postings)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in sorted order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.names, prefix)
+        while i < len(self.names) and len(matches) < limit and self.names[i].startswith(prefix):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, name) pairs for names within
+        `max_distance` edits of `query`, closest first.
+        """
+        query = query.lower()
+        low, high = len(query) - max_distance, len(query) + max_distance
+        grams = trigrams(query)
+
+        # One edit changes at most GRAM trigrams, so a match shares at least
+        # `shared` of the query's trigrams
+        shared = len(grams) - GRAM * max_distance
+        if shared <= 0:
+            # Too short for trigrams to rule anything out: check every name
+            # of a possible length instead
+            candidates = self.length_band(low, high)
+        else:
+            candidates = self.trigram_candidates(grams, shared, low, high)
+
+        matches = []
+        for i in candidates:
+            name = self.names[i]
+            distance = edit_distance(query, name, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, name))
+        matches.sort()
+        return matches[:limit]
+
+    def trigram_candidates(self, grams, shared, low, high):
+        """
+        Returns the indices of names between `low` and `high` characters
+        long that contain at least `shared` of the trigrams.
+        """
+        lists = sorted((self.postings_for(gram) for gram in grams), key=len)
+
+        # A match is missing from at most len(lists) - shared of the lists,
+        # so it appears in at least one of the rest, taken shortest first.
+        # Those, and any other short lists, are scanned; the remaining long
+        # lists are probed by bisection for each candidate.
+        seeds = len(lists) - shared + 1
+        while seeds < len(lists) and len(lists[seeds]) <= LONG_POSTINGS:
+            seeds += 1
+        counts = Counter()
+        for postings in lists[:seeds]:
+            counts.update(postings)
+
+        candidates = []
+        probed = len(lists) - seeds
+        for i, count in counts.items():
+            if count + probed < shared or not low <= len(self.names[i]) <= high:
+                continue
+            for k in range(seeds, len(lists)):
+                if count >= shared or count + len(lists) - k < shared:
+                    break
+                postings = lists[k]
+                position = bisect_left(postings, i)
+                if position < len(postings) and postings[position] == i:
+                    count += 1
+            if count >= shared:
+                candidates.append(i)
+        return candidates
+
+    def length_band(self, low, high):
+        """
+        Returns the indices of names between `low` and `high` characters
+        long. Names are grouped by length the first time this is needed.
+        """
+        if self.by_length is None:
+            self.by_length = {}
+            for i, name in enumerate(self.names):
+                self.by_length.setdefault(len(name), array(INDEX)).append(i)
+        candidates = []
+        for length in range(max(0, low), high + 1):
+            candidates.extend(self.by_length.get(length, ()))
+        return candidates
+
+    def postings_for(self, gram):
+        """
+        Returns the indices of the names containing a trigram.
+        """
+        g = self.grams.get(gram)
+        if g is None:
+            return ()
+        return self.postings[self.offsets[g]:self.offsets[g + 1]]
+
+
+def trigrams(name):
+    """
+    Returns the set of padded trigrams in a name.
+    """
+    padded = START + name + END
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between two strings, giving up with limit + 1 as
+    soon as every alignment costs more than limit edits.
+
+    Only cells within `limit` of the diagonal can stay within the limit,
+    so each row fills in just that band.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        x = a[i - 1]
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        best = current[0]
+        for j in range(low, high + 1):
+            cost = min(previous[j] + 1,
+                       current[j - 1] + 1,
+                       previous[j - 1] + (x != b[j - 1]))
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
@@ -0,0 +1,195 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import time
+
+import degrees
+
+# Whether names are resolved fuzzily, set from the command line
+fuzzy = False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries against one loaded graph. "
+                    "Each input line is a JSON object with 'source' and 'target' "
+                    "names (or 'source_id' and 'target_id' IMDB ids).")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="listen on a Unix socket instead of reading stdin")
+    parser.add_argument("--precompute", metavar="NAME", action="append", default=[],
+                        help="cache the distance tree of a person queried often "
+                             "(may be repeated)")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="resolve misspelled names to the closest unique match")
+    parser.add_argument("--cache-mb", type=int, default=256,
+                        help="memory budget for cached distance trees")
+    args = parser.parse_args()
+
+    # Load data once; forked workers share the parent's read-only graph
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    # Build hub distance trees before forking so every worker shares them
+    degrees.distance_cache.max_bytes = args.cache_mb * 1024 * 1024
+    for name in args.precompute:
+        person_id = degrees.person_id_for_name(name, interactive=False)
+        if person_id is None:
+            sys.exit(f"Person not found or ambiguous: {name}")
+        degrees.distance_tree(person_id)
+
+    global fuzzy
+    fuzzy = args.fuzzy
+
+    with pool_for(args.directory, args.workers) as pool:
+        if args.socket is None:
+            serve(sys.stdin, sys.stdout, pool)
+        else:
+            serve_socket(args.socket, pool)
+
+
+def pool_for(directory, workers):
+    """
+    Returns a process pool whose workers have the graph loaded.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return context.Pool(workers, initializer=init_worker, initargs=(directory,))
+
+
+def init_worker(directory):
+    """
+    Loads the graph in a worker that did not inherit it from a fork.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory)
+
+
+def answer(line):
+    """
+    Answers one line-delimited JSON query, returning the response object.
+    """
+    start = time.perf_counter()
+    try:
+        query = json.loads(line)
+        source = resolve(query, "source")
+        target = resolve(query, "target")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return {"error": f"bad query: {e}", "latency_ms": elapsed_ms(start)}
+
+    response = {"source": source, "target": target}
+    if source is None or target is None:
+        response["error"] = "person not found or ambiguous"
+    else:
+        path = degrees.shortest_path(source, target)
+        if path is None:
+            response["degrees"] = None
+        else:
+            response["degrees"] = len(path)
+            response["path"] = [list(step) for step in path]
+    response["latency_ms"] = elapsed_ms(start)
+    return response
+
+
+def resolve(query, key):
+    """
+    Returns the IMDB id for the source or target of a query.
+    """
+    if f"{key}_id" in query:
+        person_id = str(query[f"{key}_id"])
+        return person_id if person_id in degrees.graph.person_index else None
+    return degrees.person_id_for_name(query[key], interactive=False, fuzzy=fuzzy)
+
+
+def serve(lines, out, pool):
+    """
+    Answers every non-blank line from `lines` on the pool, writing one JSON
+    response per line to `out` in input order, then reports statistics.
+    """
+    queries = (line for line in lines if line.strip())
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for response in pool.imap(answer, queries, chunksize=16):
+        latencies.append(response["latency_ms"])
+        errors += "error" in response
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+    report(latencies, errors, time.perf_counter() - start)
+
+
+def serve_socket(path, pool):
+    """
+    Serves line-delimited JSON queries to any number of clients on a Unix socket.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (line.decode("utf-8") for line in self.rfile)
+            serve(lines, Writer(self.wfile), pool)
+
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+class Writer():
+    """
+    Text wrapper around a socket's binary write stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        self.stream.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.stream.flush()
+
+
+def report(latencies, errors, seconds):
+    """
+    Prints throughput and latency percentiles for a batch of queries to stderr.
+    """
+    count = len(latencies)
+    if count == 0:
+        print("No queries.", file=sys.stderr)
+        return
+    latencies = sorted(latencies)
+    print(f"{count} queries ({errors} errors) in {seconds:.3f}s, "
+          f"{count / seconds:.1f} queries/s", file=sys.stderr)
+    print("latency ms: " + ", ".join(
+        f"p{p} {percentile(latencies, p):.3f}" for p in (50, 95, 99)
+    ) + f", max {latencies[-1]:.3f}", file=sys.stderr)
+
+
+def percentile(ordered, p):
+    """
+    Returns the p-th percentile of an already sorted list.
+    """
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+if __name__ == "__main__":
+    main()
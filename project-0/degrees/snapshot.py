@@ -0,0 +1,143 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CoStarGraph, INDEX
+from nameindex import NameIndex
+
+# Snapshot file written alongside the CSV files
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGREES3"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Arrays stored in the snapshot, memory-mapped on load
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "index_offsets", "index_postings"]
+
+# String tables stored in the snapshot: ids and names by graph index,
+# then the name index's sorted names and trigrams
+TABLES = ["person_ids", "names", "movie_ids", "index_names", "index_grams"]
+
+# Separates entries in a string table
+SEPARATOR = "\0"
+
+
+def source_stamp(directory):
+    """
+    Returns the modification time and size of each CSV file, used to tell
+    whether a snapshot is out of date.
+    """
+    stamp = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamp[filename] = [stat.st_mtime_ns, stat.st_size]
+    return stamp
+
+
+def write_snapshot(directory, graph, person_names, name_index, dropped):
+    """
+    Writes the graph, its id and name tables, the name index, and the counts
+    of rows dropped while loading to a binary snapshot file.
+
+    Layout: magic, 8-byte header length, JSON header, then each section
+    aligned to 8 bytes. The header records where each section starts.
+    """
+    arrays = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_stars": graph.movie_stars,
+        "index_offsets": name_index.offsets,
+        "index_postings": name_index.postings,
+    }
+    tables = {
+        "person_ids": graph.person_ids,
+        "names": person_names,
+        "movie_ids": graph.movie_ids,
+        "index_names": name_index.names,
+        "index_grams": name_index.gram_list,
+    }
+    sections = [(name, arrays[name].tobytes()) for name in ARRAYS]
+    sections += [(name, SEPARATOR.join(tables[name]).encode("utf-8")) for name in TABLES]
+
+    # Work out section offsets relative to the end of the header
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position += align(len(data))
+    header = json.dumps({
+        "sources": source_stamp(directory),
+        "byteorder": sys.byteorder,
+        "itemsize": array(INDEX).itemsize,
+        "sections": layout,
+        "dropped": dropped,
+    }).encode("utf-8")
+    start = align(len(MAGIC) + 8 + len(header))
+
+    # Write to a temporary file first so a failed write never leaves a bad snapshot
+    path = os.path.join(directory, FILENAME)
+    with open(path + ".tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(bytes(start - f.tell()))
+        for name, data in sections:
+            f.write(data)
+            f.write(bytes(align(len(data)) - len(data)))
+    os.replace(path + ".tmp", path)
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps a snapshot written by write_snapshot.
+
+    Returns (graph, person_names, name_index, dropped), or None if there is no snapshot or it
+    no longer matches the CSV files.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        header_length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_length))
+        if (header["sources"] != source_stamp(directory)
+                or header["byteorder"] != sys.byteorder
+                or header["itemsize"] != array(INDEX).itemsize):
+            return None
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    start = align(len(MAGIC) + 8 + header_length)
+
+    def section(name):
+        offset, length = header["sections"][name]
+        return data[start + offset:start + offset + length]
+
+    # Arrays stay in the mapped file and are paged in as the search touches them
+    arrays = {name: section(name).cast(INDEX) for name in ARRAYS}
+
+    # String tables are decoded up front
+    tables = {}
+    for name in TABLES:
+        text = str(section(name), "utf-8")
+        tables[name] = text.split(SEPARATOR) if text else []
+
+    graph = CoStarGraph(tables["person_ids"], tables["movie_ids"],
+                        arrays["person_offsets"], arrays["person_movies"],
+                        arrays["movie_offsets"], arrays["movie_stars"])
+    name_index = NameIndex(tables["index_names"], tables["index_grams"],
+                           arrays["index_offsets"], arrays["index_postings"])
+    return graph, tables["names"], name_index, header["dropped"]
+
+
+def align(size):
+    """
+    Rounds a size up to a multiple of 8 bytes.
+    """
+    return (size + 7) & ~7
@@ -0,0 +1,68 @@
+import csv
+import itertools
+
+# Rows read from a CSV file per chunk
+CHUNK_ROWS = 65536
+
+
+def read_chunks(path, columns, dropped, chunk_rows=CHUNK_ROWS):
+    """
+    Streams a CSV file as lists of tuples holding only the named columns,
+    at most chunk_rows rows at a time.
+
+    Rows with the wrong number of fields are skipped and counted in
+    dropped["malformed"].
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indices = [header.index(column) for column in columns]
+        width = len(header)
+        while True:
+            rows = list(itertools.islice(reader, chunk_rows))
+            if not rows:
+                return
+            chunk = []
+            for row in rows:
+                if len(row) != width:
+                    dropped["malformed"] = dropped.get("malformed", 0) + 1
+                    continue
+                chunk.append(tuple(row[i] for i in indices))
+            yield chunk
+
+
+class LazyDetails():
+    """
+    Display-only columns of a CSV file (such as birth or title), read from
+    disk only for the ids that are actually looked up.
+    """
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+        self.cache = {}
+
+    def get(self, key, field):
+        """
+        Returns one field for one id, or None if the id is not in the file.
+        """
+        row = self.fetch([key]).get(key)
+        return None if row is None else row[field]
+
+    def fetch(self, keys):
+        """
+        Returns a dict from each id to a dict of its fields, scanning the file
+        at most once for all ids not already cached. Unknown ids map to None.
+        """
+        missing = {key for key in keys if key not in self.cache}
+        if missing:
+            for chunk in read_chunks(self.path, ["id"] + self.fields, {}):
+                for key, *values in chunk:
+                    if key in missing:
+                        self.cache[key] = dict(zip(self.fields, values))
+                        missing.discard(key)
+                if not missing:
+                    break
+            for key in missing:
+                self.cache[key] = None
+        return {key: self.cache[key] for key in keys}
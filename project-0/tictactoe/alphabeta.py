@@ -0,0 +1,147 @@
+"""
+Alpha-beta search for Tic Tac Toe, with move ordering and node counts.
+"""
+
+import bitboard
+import tictactoe as ttt
+
+# Static move order: centre, then corners, then edges (as bit indices)
+ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+
+class AlphaBeta():
+    """
+    Alpha-beta searcher over bitboard positions.
+
+    Killer moves (the last move to cause a cutoff at each depth) are tried
+    first and are kept between searches. `nodes` counts positions visited.
+    """
+
+    def __init__(self):
+        self.killers = {}
+        self.nodes = 0
+
+    def search(self, x, o):
+        """
+        Returns (value, index) of the best move for the player to move.
+        """
+        maximising = bitboard.x_to_move(x, o)
+        # Utilities lie in [-1, 1], so a win found for the mover ends the search
+        alpha, beta = -1, 1
+        best_value, best_index = None, None
+        for index in self.ordered(x, o, 0):
+            value = self.value(*bitboard.play(x, o, index), alpha, beta, 1)
+            if maximising and (best_value is None or value > best_value):
+                best_value, best_index = value, index
+                alpha = max(alpha, value)
+            elif not maximising and (best_value is None or value < best_value):
+                best_value, best_index = value, index
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+        return best_value, best_index
+
+    def value(self, x, o, alpha, beta, depth):
+        """
+        Returns the minimax value of a position, searching only moves that
+        can still change the result within the (alpha, beta) window.
+        """
+        self.nodes += 1
+        if bitboard.terminal(x, o):
+            return ttt.utility_bits(x, o)
+
+        maximising = bitboard.x_to_move(x, o)
+        best = -2 if maximising else 2
+        for index in self.ordered(x, o, depth):
+            value = self.value(*bitboard.play(x, o, index), alpha, beta, depth + 1)
+            if maximising:
+                best = max(best, value)
+                alpha = max(alpha, best)
+            else:
+                best = min(best, value)
+                beta = min(beta, best)
+            if alpha >= beta:
+                # Remember the refutation to try it first next time at this depth
+                self.killers[depth] = index
+                break
+        return best
+
+    def ordered(self, x, o, depth):
+        """
+        Returns the empty cells in search order, killer move first.
+        """
+        empty = bitboard.legal(x, o)
+        order = [index for index in ORDER if empty >> index & 1]
+        killer = self.killers.get(depth)
+        if killer in order:
+            order.remove(killer)
+            order.insert(0, killer)
+        return order
+
+
+# Shared searcher so killer moves carry over between calls
+searcher = AlphaBeta()
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board,
+    found with alpha-beta search.
+    """
+    if ttt.terminal(board):
+        return None
+    _, index = searcher.search(*bitboard.encode(board))
+    return bitboard.cell(index)
+
+
+def minimax_nodes(board):
+    """
+    Counts the positions the original minimax search (max_value/min_value,
+    which only stop early on a ±1 result) visits to choose a move.
+    """
+    nodes = 0
+
+    def value(x, o):
+        nonlocal nodes
+        nodes += 1
+        if bitboard.terminal(x, o):
+            return ttt.utility_bits(x, o)
+        maximising = bitboard.x_to_move(x, o)
+        best = -99 if maximising else 99
+        for index in bitboard.moves(x, o):
+            outcome = value(*bitboard.play(x, o, index))
+            best = max(best, outcome) if maximising else min(best, outcome)
+            if best == (1 if maximising else -1):
+                break
+        return best
+
+    x, o = bitboard.encode(board)
+    goal = 1 if bitboard.x_to_move(x, o) else -1
+    for index in bitboard.moves(x, o):
+        if value(*bitboard.play(x, o, index)) == goal:
+            break
+    return nodes
+
+
+def alphabeta_nodes(board):
+    """
+    Counts the positions a fresh alpha-beta search visits to choose a move.
+    """
+    engine = AlphaBeta()
+    engine.search(*bitboard.encode(board))
+    return engine.nodes
+
+
+def main():
+    positions = [
+        ("empty board", ttt.initial_state()),
+        ("X in a corner", ttt.result(ttt.initial_state(), (0, 0))),
+        ("X centre, O edge", ttt.result(ttt.result(ttt.initial_state(), (1, 1)), (0, 1))),
+    ]
+    print(f"{'position':<20}{'minimax':>10}{'alpha-beta':>12}")
+    for name, board in positions:
+        print(f"{name:<20}{minimax_nodes(board):>10}{alphabeta_nodes(board):>12}")
+
+
+if __name__ == "__main__":
+    main()
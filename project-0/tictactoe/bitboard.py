@@ -0,0 +1,160 @@
+"""
+Bitboard representation of a Tic Tac Toe position.
+
+A position is a pair of 9-bit masks (x, o), one per player, where cell
+(i, j) is bit 3 * i + j.
+"""
+
+# All nine cells
+FULL = 0b111111111
+
+# Masks for the 3 rows, 3 columns and 2 diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# WINS[bits] is True if the set of cells in `bits` contains a line
+WINS = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1)]
+
+# Number of set bits in each mask
+POPCOUNT = [bin(bits).count("1") for bits in range(FULL + 1)]
+
+
+def bit(action):
+    """
+    Returns the bit for cell (i, j).
+    """
+    i, j = action
+    return 1 << (3 * i + j)
+
+
+def cell(index):
+    """
+    Returns the (i, j) cell for a bit index.
+    """
+    return divmod(index, 3)
+
+
+def encode(board, x_mark="X", o_mark="O"):
+    """
+    Converts a 3x3 list-of-lists board into (x, o) masks.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, mark in enumerate(row):
+            if mark == x_mark:
+                x |= 1 << (3 * i + j)
+            elif mark == o_mark:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(x, o, x_mark="X", o_mark="O", empty=None):
+    """
+    Converts (x, o) masks back into a 3x3 list-of-lists board.
+    """
+    return [[x_mark if x >> (3 * i + j) & 1 else o_mark if o >> (3 * i + j) & 1 else empty
+             for j in range(3)]
+            for i in range(3)]
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn (X always moves first).
+    """
+    return POPCOUNT[x] == POPCOUNT[o]
+
+
+def legal(x, o):
+    """
+    Returns the mask of empty cells.
+    """
+    return FULL & ~(x | o)
+
+
+def moves(x, o):
+    """
+    Yields the bit index of each empty cell.
+    """
+    empty = legal(x, o)
+    while empty:
+        low = empty & -empty
+        yield low.bit_length() - 1
+        empty ^= low
+
+
+def play(x, o, index):
+    """
+    Returns the masks after the player to move takes cell `index`.
+    """
+    move = 1 << index
+    if (x | o) & move:
+        raise Exception("cell already taken")
+    if x_to_move(x, o):
+        return x | move, o
+    return x, o | move
+
+
+def winner(x, o):
+    """
+    Returns "X" or "O" for the player with a line, or None.
+    """
+    if WINS[x]:
+        return "X"
+    if WINS[o]:
+        return "O"
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if someone has won or the board is full.
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+# The 8 symmetries of the board (rotations and reflections), each mapping
+# cell (i, j) to the cell it moves to
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+]
+
+# SYMMETRY_TABLES[s][bits] is `bits` with symmetry s applied to every cell
+SYMMETRY_TABLES = []
+for symmetry in SYMMETRIES:
+    table = []
+    for bits in range(FULL + 1):
+        moved = 0
+        for index in range(9):
+            if bits >> index & 1:
+                moved |= bit(symmetry(*cell(index)))
+        table.append(moved)
+    SYMMETRY_TABLES.append(table)
+
+
+def canonical(x, o):
+    """
+    Returns a key shared by a position and all its rotations and reflections.
+    """
+    return min((table[x] << 9) | table[o] for table in SYMMETRY_TABLES)
+
+
+# TERNARY[bits] is the base-3 number with a 1 in each digit set in `bits`
+TERNARY = [sum(3 ** index for index in range(9) if bits >> index & 1) for bits in range(FULL + 1)]
+
+
+def ternary(x, o):
+    """
+    Returns a position's base-3 index (0 empty, 1 X, 2 O per cell), a dense
+    number below 3 ** 9 usable as a table offset.
+    """
+    return TERNARY[x] + 2 * TERNARY[o]
@@ -0,0 +1,60 @@
+"""
+Generates the Tic Tac Toe opening book: the best move and value of every
+reachable position, solved once and stored one byte per position.
+"""
+
+import sys
+
+import bitboard
+import tictactoe as ttt
+from alphabeta import ORDER
+
+# Marks a byte as holding a solved position
+REACHABLE = 0x80
+
+# Move index stored for positions with no moves left
+NO_MOVE = 0x0F
+
+
+def solve():
+    """
+    Returns a bytearray with an entry for every position reachable from the
+    empty board, indexed by bitboard.ternary.
+    """
+    book = bytearray(3 ** 9)
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+
+        value = ttt.value_bits(x, o)
+        if bitboard.terminal(x, o):
+            move = NO_MOVE
+        else:
+            # Among equally good moves prefer centre, then corners, then edges
+            children = {index: bitboard.play(x, o, index) for index in bitboard.moves(x, o)}
+            move = next(index for index in ORDER
+                        if index in children and ttt.value_bits(*children[index]) == value)
+            stack.extend(children.values())
+
+        book[bitboard.ternary(x, o)] = REACHABLE | ((value + 1) << 4) | move
+    return book
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [output file]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+
+    book = solve()
+    with open(path, "wb") as f:
+        f.write(book)
+    positions = sum(1 for entry in book if entry & REACHABLE)
+    print(f"Wrote {positions} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Monte Carlo Tree Search (UCT) player for Tic Tac Toe style games.
+
+A game is any object or module providing player, actions, result, terminal
+and utility in the style of tictactoe.py, such as the tictactoe module
+itself or an mnk.MNKGame.
+"""
+
+import importlib
+import math
+import multiprocessing
+import random
+import time
+import types
+
+import tictactoe as ttt
+
+# Exploration constant for UCB1
+EXPLORATION = math.sqrt(2)
+
+
+def state_key(state):
+    """
+    Returns a hashable key for a state (list-of-lists boards become tuples).
+    """
+    if isinstance(state, list):
+        return tuple(state_key(row) for row in state)
+    return state
+
+
+class Node():
+    """
+    A state in the search tree. `wins` is the total reward for the player
+    who made the move into this node, so parents pick children by it.
+    """
+
+    def __init__(self, game, state, parent=None, action=None):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.children = {}
+        self.untried = [] if game.terminal(state) else sorted(game.actions(state))
+        self.mover = None if parent is None else game.player(parent.state)
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self, exploration):
+        """
+        Returns the child with the highest UCB1 score.
+        """
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)
+        )
+
+
+class MCTSPlayer():
+    """
+    UCT player with an iteration and/or time budget per move.
+
+    The tree is kept between moves: when asked to move again, the player
+    looks for the new state among the grandchildren of its last choice and
+    continues from that subtree. With workers > 1, extra processes search
+    independent trees from the same root and their root visit counts are
+    added together (root parallelisation). Use the player in a with
+    statement, or call close(), to shut the worker processes down.
+    """
+
+    def __init__(self, game=ttt, iterations=None, time_limit=1.0, workers=1,
+                 exploration=EXPLORATION, seed=None):
+        if iterations is None and time_limit is None:
+            raise ValueError("need an iteration or time budget")
+        self.game = game
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+        self.pool = None
+
+    def choose(self, state):
+        """
+        Returns the action to play in `state`.
+        """
+        if self.game.terminal(state):
+            return None
+        self.root = self.reuse(state) or Node(self.game, state)
+
+        # Start the workers' searches first so they run alongside this one
+        pending = None
+        if self.workers > 1:
+            budget = (self.iterations, self.time_limit)
+            tasks = [(game_ref(self.game), state, budget, self.exploration, self.rng.random())
+                     for _ in range(self.workers - 1)]
+            # The pool is started on first use and kept for later moves
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.workers - 1)
+            pending = self.pool.map_async(search_worker, tasks)
+        self.search(self.root)
+
+        totals = {action: child.visits for action, child in self.root.children.items()}
+        if pending is not None:
+            for visits in pending.get():
+                for action, count in visits.items():
+                    totals[action] = totals.get(action, 0) + count
+
+        action = max(totals, key=lambda a: (totals[a], a))
+        # Keep the chosen subtree for the next move
+        if action in self.root.children:
+            self.root = self.root.children[action]
+            self.root.parent = None
+        else:
+            self.root = None
+        return action
+
+    def close(self):
+        """
+        Shuts down the worker pool, if one was started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reuse(self, state):
+        """
+        Returns the existing node for `state` if it is the old root or one
+        of its children, detached from the rest of the tree.
+        """
+        if self.root is None:
+            return None
+        key = state_key(state)
+        for node in [self.root] + list(self.root.children.values()):
+            if state_key(node.state) == key:
+                node.parent = None
+                return node
+        return None
+
+    def search(self, root):
+        """
+        Runs selection, expansion, simulation and backpropagation from the
+        root until the budget is spent.
+        """
+        game = self.game
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        iteration = 0
+        while True:
+            if self.iterations is not None and iteration >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            iteration += 1
+
+            # Selection: descend through fully expanded nodes
+            node = root
+            while not node.untried and node.children:
+                node = node.select(self.exploration)
+
+            # Expansion: add one untried move
+            if node.untried:
+                action = node.untried.pop(self.rng.randrange(len(node.untried)))
+                child = Node(game, game.result(node.state, action), node, action)
+                node.children[action] = child
+                node = child
+
+            # Simulation: random playout to the end of the game
+            state = node.state
+            while not game.terminal(state):
+                state = game.result(state, self.rng.choice(sorted(game.actions(state))))
+            utility = game.utility(state)
+
+            # Backpropagation: score each node for the player who moved into it
+            while node is not None:
+                node.visits += 1
+                if node.mover is not None:
+                    reward = utility if node.mover == ttt.X else -utility
+                    node.wins += (reward + 1) / 2
+                node = node.parent
+
+
+def game_ref(game):
+    """
+    Returns something picklable that identifies the game for a worker:
+    the module name for a module, or the game object itself.
+    """
+    if isinstance(game, types.ModuleType):
+        return game.__name__
+    return game
+
+
+def search_worker(task):
+    """
+    Searches a fresh tree in a worker process, returning root visit counts.
+    """
+    ref, state, (iterations, time_limit), exploration, seed = task
+    game = importlib.import_module(ref) if isinstance(ref, str) else ref
+    player = MCTSPlayer(game, iterations, time_limit, 1, exploration, seed)
+    root = Node(game, state)
+    player.search(root)
+    return {action: child.visits for action, child in root.children.items()}
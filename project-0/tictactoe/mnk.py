@@ -0,0 +1,268 @@
+"""
+Generalised m,n,k game engine: an m-row by n-column board where the first
+player to get k in a row wins (Tic Tac Toe is 3,3,3; gomoku is 15,15,5).
+"""
+
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Directions to look for lines: across, down, and both diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# Score for a won position, larger than any heuristic value
+WIN = 10 ** 9
+
+
+class State():
+    """
+    Immutable position: the cells in row-major order, the last move played
+    (or None) and the winner, found incrementally from the last move.
+    """
+
+    __slots__ = ("cells", "last", "winner", "moves")
+
+    def __init__(self, cells, last, winner, moves):
+        self.cells = cells
+        self.last = last
+        self.winner = winner
+        self.moves = moves
+
+    def __eq__(self, other):
+        return isinstance(other, State) and self.cells == other.cells
+
+    def __hash__(self):
+        return hash(self.cells)
+
+
+class MNKGame():
+    """
+    Rules of an m,n,k game, with the same functions as the tictactoe module
+    (player, actions, result, winner, terminal, utility) over State objects.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError("k cannot be longer than the board")
+        self.m = m
+        self.n = n
+        self.k = k
+
+    def initial_state(self):
+        return State((EMPTY,) * (self.m * self.n), None, None, 0)
+
+    def player(self, state):
+        return X if state.moves % 2 == 0 else O
+
+    def actions(self, state):
+        return {divmod(index, self.n) for index, cell in enumerate(state.cells) if cell is EMPTY}
+
+    def result(self, state, action):
+        i, j = action
+        index = i * self.n + j
+        if not (0 <= i < self.m and 0 <= j < self.n) or state.cells[index] is not EMPTY:
+            raise Exception("invalid action")
+        mark = self.player(state)
+        cells = state.cells[:index] + (mark,) + state.cells[index + 1:]
+        winner = mark if self.wins(cells, index) else None
+        return State(cells, index, winner, state.moves + 1)
+
+    def winner(self, state):
+        return state.winner
+
+    def terminal(self, state):
+        return state.winner is not None or state.moves == self.m * self.n
+
+    def utility(self, state):
+        if state.winner == X:
+            return 1
+        if state.winner == O:
+            return -1
+        return 0
+
+    def wins(self, cells, index):
+        """
+        Returns True if the stone at `index` completes k in a row. Only the
+        four lines through that cell need checking.
+        """
+        mark = cells[index]
+        i, j = divmod(index, self.n)
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = i + sign * di, j + sign * dj
+                while 0 <= r < self.m and 0 <= c < self.n and cells[r * self.n + c] == mark:
+                    count += 1
+                    r += sign * di
+                    c += sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def windows(self):
+        """
+        Returns every line of k cell indices on the board, computed once.
+        """
+        if not hasattr(self, "_windows"):
+            self._windows = []
+            for i in range(self.m):
+                for j in range(self.n):
+                    for di, dj in DIRECTIONS:
+                        end_i, end_j = i + di * (self.k - 1), j + dj * (self.k - 1)
+                        if 0 <= end_i < self.m and 0 <= end_j < self.n:
+                            self._windows.append(tuple(
+                                (i + di * step) * self.n + j + dj * step
+                                for step in range(self.k)
+                            ))
+        return self._windows
+
+
+def line_heuristic(game, cells):
+    """
+    Default evaluation from X's point of view: every k-cell line still open
+    to only one player scores 10 ** (stones in it) for that player.
+    """
+    score = 0
+    for window in game.windows():
+        xs = os = 0
+        for index in window:
+            cell = cells[index]
+            if cell == X:
+                xs += 1
+            elif cell == O:
+                os += 1
+        if xs and not os:
+            score += 10 ** xs
+        elif os and not xs:
+            score -= 10 ** os
+    return score
+
+
+class Timeout(Exception):
+    pass
+
+
+class Searcher():
+    """
+    Iterative-deepening alpha-beta search within a wall-clock budget.
+
+    Each iteration searches one ply deeper, trying the previous iteration's
+    best move first. When time runs out mid-iteration, the best move from the
+    last completed depth is used. Leaves that are not terminal are scored by
+    `heuristic(game, cells)` from X's point of view.
+    """
+
+    def __init__(self, game, heuristic=line_heuristic, time_limit=1.0, max_depth=None, radius=2):
+        self.game = game
+        self.heuristic = heuristic
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.radius = radius
+        self.nodes = 0
+
+    def best_move(self, state):
+        """
+        Returns (action, value, depth) for the player to move, value being
+        from X's point of view and depth the deepest completed search.
+        """
+        if self.game.terminal(state):
+            return None, self.game.utility(state) * WIN, 0
+
+        self.deadline = time.perf_counter() + self.time_limit
+        cells = list(state.cells)
+        sign = 1 if self.game.player(state) == X else -1
+        moves = self.candidates(cells)
+        best, best_value, depth = moves[0], None, 0
+        max_depth = self.max_depth or cells.count(EMPTY)
+
+        while depth < max_depth:
+            try:
+                value, move = self.root(cells, state.moves, depth + 1, sign, moves)
+            except Timeout:
+                break
+            depth += 1
+            best, best_value = move, value
+            # Search the best move first next time
+            moves.remove(move)
+            moves.insert(0, move)
+            # Stop once a forced win or loss has been found
+            if abs(value) >= WIN - len(cells):
+                break
+
+        return divmod(best, self.game.n), None if best_value is None else sign * best_value, depth
+
+    def root(self, cells, moves_made, depth, sign, moves):
+        alpha, beta = -WIN - 1, WIN + 1
+        best_value, best_move = None, None
+        for index in moves:
+            value = -self.negamax(cells, index, moves_made, depth - 1, -beta, -alpha, -sign)
+            if best_value is None or value > best_value:
+                best_value, best_move = value, index
+            alpha = max(alpha, value)
+        return best_value, best_move
+
+    def negamax(self, cells, index, moves_made, depth, alpha, beta, sign):
+        """
+        Plays the opponent's stone at `index`, then returns the value of the
+        position for the side to move (`sign` 1 for X, -1 for O).
+        """
+        self.nodes += 1
+        if self.nodes & 63 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        mark = X if sign == -1 else O
+        cells[index] = mark
+        try:
+            if self.game.wins(cells, index):
+                # The previous player just won; prefer quicker wins
+                return -(WIN - moves_made)
+            moves_made += 1
+            if moves_made == len(cells):
+                return 0
+            if depth == 0:
+                return sign * self.heuristic(self.game, cells)
+
+            best = -WIN - 1
+            for move in self.candidates(cells):
+                value = -self.negamax(cells, move, moves_made, depth - 1, -beta, -alpha, -sign)
+                if value > best:
+                    best = value
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+            return best
+        finally:
+            cells[index] = EMPTY
+
+    def candidates(self, cells):
+        """
+        Returns empty cells within `radius` of a stone, nearest the centre
+        first; on an empty board, just the centre.
+        """
+        game = self.game
+        occupied = [index for index, cell in enumerate(cells) if cell is not EMPTY]
+        centre_i, centre_j = (game.m - 1) / 2, (game.n - 1) / 2
+        if not occupied:
+            return [int(centre_i) * game.n + int(centre_j)]
+        near = set()
+        for index in occupied:
+            i, j = divmod(index, game.n)
+            for r in range(max(0, i - self.radius), min(game.m, i + self.radius + 1)):
+                for c in range(max(0, j - self.radius), min(game.n, j + self.radius + 1)):
+                    if cells[r * game.n + c] is EMPTY:
+                        near.add(r * game.n + c)
+        if not near:
+            near = {index for index, cell in enumerate(cells) if cell is EMPTY}
+        return sorted(near, key=lambda index: (abs(index // game.n - centre_i)
+                                               + abs(index % game.n - centre_j), index))
+
+
+def best_move(game, state, time_limit=1.0, heuristic=line_heuristic, max_depth=None):
+    """
+    Returns the action chosen by iterative-deepening alpha-beta within
+    `time_limit` seconds.
+    """
+    action, _, _ = Searcher(game, heuristic, time_limit, max_depth).best_move(state)
+    return action
@@ -17,6 +17,9 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Load the perfect-play opening book so AI moves are table lookups
+ttt.load_book()
+
 user = None
 board = ttt.initial_state()
 ai_turn = False
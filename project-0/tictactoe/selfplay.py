@@ -0,0 +1,126 @@
+"""
+Headless self-play harness: plays many games of Tic Tac Toe between two AI
+agents on a process pool and reports results and move latencies.
+"""
+
+import argparse
+import multiprocessing
+import random
+import time
+
+import alphabeta
+import tictactoe as ttt
+
+
+def random_agent(board, rng):
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def minimax_agent(board, rng):
+    return ttt.minimax_uncached(board)
+
+
+def cached_agent(board, rng):
+    # Transposition-table search, bypassing the opening book
+    choose = max if ttt.player(board) == ttt.X else min
+    return choose(sorted(ttt.actions(board)), key=lambda action: ttt.value(ttt.result(board, action)))
+
+
+def book_agent(board, rng):
+    return ttt.minimax(board)
+
+
+def alphabeta_agent(board, rng):
+    return alphabeta.alphabeta(board)
+
+
+AGENTS = {
+    "random": random_agent,
+    "minimax": minimax_agent,
+    "cached": cached_agent,
+    "book": book_agent,
+    "alphabeta": alphabeta_agent,
+}
+
+
+def play_game(task):
+    """
+    Plays one game. `task` is (x agent name, o agent name, seed).
+
+    Returns (winner, latencies) where winner is ttt.X, ttt.O or None, and
+    latencies maps each agent's side to its per-move times in seconds.
+    """
+    x_agent, o_agent, seed = task
+    rng = random.Random(seed)
+    agents = {ttt.X: AGENTS[x_agent], ttt.O: AGENTS[o_agent]}
+    latencies = {ttt.X: [], ttt.O: []}
+
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        side = ttt.player(board)
+        start = time.perf_counter()
+        action = agents[side](board, rng)
+        latencies[side].append(time.perf_counter() - start)
+        board = ttt.result(board, action)
+
+    return ttt.winner(board), latencies
+
+
+def self_play(x_agent, o_agent, games, workers=None, seed=0):
+    """
+    Plays `games` games with x_agent as X and o_agent as O, returning a
+    dict of win/draw/loss counts (from X's point of view) and per-move
+    latency lists for each side.
+    """
+    tasks = [(x_agent, o_agent, seed + game) for game in range(games)]
+    results = {"wins": 0, "draws": 0, "losses": 0,
+               "latencies": {ttt.X: [], ttt.O: []}}
+
+    with multiprocessing.Pool(workers) as pool:
+        for winner, latencies in pool.imap_unordered(play_game, tasks, chunksize=8):
+            if winner == ttt.X:
+                results["wins"] += 1
+            elif winner == ttt.O:
+                results["losses"] += 1
+            else:
+                results["draws"] += 1
+            for side in latencies:
+                results["latencies"][side].extend(latencies[side])
+    return results
+
+
+def percentile(ordered, p):
+    """
+    Returns the p-th percentile of an already sorted list.
+    """
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI agents against each other.")
+    parser.add_argument("x", choices=list(AGENTS), help="agent playing X")
+    parser.add_argument("o", choices=list(AGENTS), help="agent playing O")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = self_play(args.x, args.o, args.games, args.workers, args.seed)
+    seconds = time.perf_counter() - start
+
+    print(f"{args.games} games of {args.x} (X) vs {args.o} (O) in {seconds:.2f}s")
+    print(f"X wins: {results['wins']}, draws: {results['draws']}, O wins: {results['losses']}")
+    for side, name in ((ttt.X, args.x), (ttt.O, args.o)):
+        latencies = sorted(results["latencies"][side])
+        print(f"{side} ({name}) move latency ms: " + ", ".join(
+            f"p{p} {percentile(latencies, p) * 1000:.3f}" for p in (50, 90, 99)
+        ) + f" over {len(latencies)} moves")
+
+
+if __name__ == "__main__":
+    main()
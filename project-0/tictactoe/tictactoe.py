@@ -2,12 +2,22 @@
 Tic Tac Toe Player
 """
 
-import math, copy
+import math
+import os
+
+import bitboard
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Transposition table mapping the canonical key of a board to its minimax value
+transposition_table = {}
+
+# Perfect-play table written by book.py, one byte per position
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+opening_book = None
+
 
 def initial_state():
     """
@@ -20,105 +30,165 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    flat_list = [ cell for row in board for cell in row if cell != EMPTY ]
 
-    # X goes first so return X for empty board
-    if flat_list == []:
-        return X
-
-    # if there are an even number of non-empty cells then X goes, else O goes
-    if len(flat_list) % 2 == 0:
-        return X
-    else:
-        return O
+    # X goes first, so X moves whenever both have made the same number of moves
+    return X if bitboard.x_to_move(*bitboard.encode(board)) else O
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    return { bitboard.cell(index) for index in bitboard.moves(*bitboard.encode(board)) }
 
-    # Iterate through board an store index of EMPTY in a set
-    return { (i,j) for i, row in enumerate(board) for j, cell in enumerate(row) if cell == EMPTY }
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
+    x, o = bitboard.encode(board)
 
     # check action is valid
-    if action not in actions(board):
-        raise Exception
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise Exception("invalid action")
 
-    # We don't want to modify the input board so make a deep copy
-    new_board = copy.deepcopy(board)
+    # play raises if the cell is taken; decoding builds a fresh board
+    x, o = bitboard.play(x, o, 3 * i + j)
+    return bitboard.decode(x, o, X, O, EMPTY)
 
-    # Insert the move at the index provided in action
-    new_board[action[0]][action[1]] = player(board)
-    return new_board
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-
-    # check for winning rows by testing if all items in list equal the first item
-    for row in board:
-        if row[0] != EMPTY and all(cell == row[0] for cell in row):
-            return row[0]
-    
-    # check for winning columns.  First combine the list items using zip
-    columns = zip(*board)
-
-    for column in columns:
-        if column[0] != EMPTY and all(cell == column[0] for cell in column):
-            return column[0]
-   
-    # check centre value first, if empty no winner as already checked rows and columns
-    centre = board[1][1]
-    if centre == EMPTY:
-        return None
-    
-    if board[0][0] == centre and board[2][2] == centre:
-        return centre
-
-    if board[2][0] == centre and board[0][2] == centre:
-        return centre
+    return bitboard.winner(*bitboard.encode(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-
-    # check if game is won
-    if winner(board) != None:
-        return True
-
-    # check if board full - if no more actions possible
-    if len(actions(board)) == 0:
-        return True
-    
-    return False
+    return bitboard.terminal(*bitboard.encode(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
+    x, o = bitboard.encode(board)
+    return utility_bits(x, o)
+
+
+def utility_bits(x, o):
+    """
+    Returns the utility of a bitboard position.
+    """
+    if bitboard.WINS[x]:
         return 1
-    if winner(board) == O:
+    if bitboard.WINS[o]:
         return -1
-    
     return 0
 
 
+def value(board):
+    """
+    Returns the minimax value of a board (1 if X wins with best play,
+    -1 if O wins, 0 for a draw), caching every position searched in
+    the transposition table.
+    """
+    return value_bits(*bitboard.encode(board))
+
+
+def value_bits(x, o):
+    """
+    Minimax value of a bitboard position, memoized under a key shared
+    with all its rotations and reflections.
+    """
+    key = bitboard.canonical(x, o)
+    if key in transposition_table:
+        return transposition_table[key]
+
+    if bitboard.terminal(x, o):
+        best = utility_bits(x, o)
+    elif bitboard.x_to_move(x, o):
+        best = max(value_bits(*bitboard.play(x, o, index)) for index in bitboard.moves(x, o))
+    else:
+        best = min(value_bits(*bitboard.play(x, o, index)) for index in bitboard.moves(x, o))
+
+    transposition_table[key] = best
+    return best
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
 
+    if terminal(board):
+        return None
+
+    # Answer straight from the opening book when it is available
+    move = book_move(board)
+    if move is not None:
+        return move
+
+    # Look up (or search and cache) the value of each move's resulting board
+    if player(board) == X:
+        return max(actions(board), key=lambda action: value(result(board, action)))
+    else:
+        return min(actions(board), key=lambda action: value(result(board, action)))
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Loads the opening book into memory, returning False if it is missing.
+    """
+    global opening_book
+    try:
+        with open(path, "rb") as f:
+            opening_book = f.read()
+    except OSError:
+        # Remember the book is missing rather than retrying every move
+        opening_book = b""
+        return False
+    return True
+
+
+def book_entry(board):
+    """
+    Returns (best move index, value) for a board from the opening book, or
+    None if there is no book or the position is not in it.
+
+    Each byte holds the best move's bit index in the low 4 bits, the value
+    plus one in the next 2 bits, and a "reachable" flag in the top bit.
+    """
+    if opening_book is None:
+        load_book()
+    if not opening_book:
+        return None
+    entry = opening_book[bitboard.ternary(*bitboard.encode(board))]
+    if not entry & 0x80:
+        return None
+    return entry & 0x0F, ((entry >> 4) & 0x03) - 1
+
+
+def book_move(board):
+    """
+    Returns the optimal action for a board from the opening book, or None.
+    """
+    entry = book_entry(board)
+    if entry is None or entry[0] > 8:
+        return None
+    return bitboard.cell(entry[0])
+
+
+def minimax_uncached(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the full game tree without the transposition table.
+    """
+
     if terminal(board):
         return None
 
@@ -0,0 +1,107 @@
+"""
+Cross-checks the fast entailment paths against the tree interpreter.
+
+compile_sentence must agree with Sentence.evaluate on every model, and
+model_check_compiled, model_check_all and sat.entails must agree with
+model_check, over random sentences and a deep Or(s, And(prev, t)) chain.
+
+Usage: python check_logic.py [--sentences N] [--depth D] [--seed S]
+"""
+
+import argparse
+import itertools
+import random
+import sys
+
+import sat
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   compile_sentence, model_check, model_check_all,
+                   model_check_compiled)
+
+SYMBOLS = [Symbol(name) for name in "PQRSTU"]
+
+
+def random_sentence(rng, depth):
+    """
+    Returns a random sentence over SYMBOLS, at most `depth` connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(SYMBOLS)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(rng, depth - 1) for _ in range(rng.randint(1, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(rng, depth - 1) for _ in range(rng.randint(1, 3))])
+    if kind == 3:
+        return Implication(random_sentence(rng, depth - 1), random_sentence(rng, depth - 1))
+    return Biconditional(random_sentence(rng, depth - 1), random_sentence(rng, depth - 1))
+
+
+def deep_chain(depth):
+    """
+    Returns the symbols and a sentence Or(s, And(prev, t)) nested `depth` times.
+    """
+    symbols = [Symbol(f"d{i}") for i in range(4)]
+    sentence = symbols[0]
+    for i in range(depth):
+        sentence = Or(symbols[1 + i % 3], And(sentence, symbols[(i + 2) % 4]))
+    return symbols, sentence
+
+
+def check_compiled(sentence):
+    """
+    Checks the compiled sentence against the tree interpreter on every model.
+    """
+    names = sorted(sentence.symbols())
+    compiled = compile_sentence(sentence, names)
+    for values in itertools.product((False, True), repeat=len(names)):
+        expected = sentence.evaluate(dict(zip(names, values)))
+        if compiled(values) != expected:
+            raise Exception(f"compiled {sentence.formula()} gives {not expected} "
+                            f"for {dict(zip(names, values))}")
+
+
+def check_entailment(knowledge, queries):
+    """
+    Checks the compiled and batch model checkers and the SAT solver
+    against model_check.
+    """
+    batch = model_check_all(knowledge, queries)
+    for query in queries:
+        expected = model_check(knowledge, query)
+        if (model_check_compiled(knowledge, query) != expected
+                or batch[query] != expected
+                or sat.entails(knowledge, query) != expected):
+            raise Exception(f"wrong entailment of {query.formula()} "
+                            f"from {knowledge.formula()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-check the entailment paths.")
+    parser.add_argument("--sentences", type=int, default=1000,
+                        help="random knowledge bases to check")
+    parser.add_argument("--depth", type=int, default=250,
+                        help="nesting depth of the deep chain")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for _ in range(args.sentences):
+        knowledge = random_sentence(rng, 4)
+        queries = [random_sentence(rng, 3), rng.choice(SYMBOLS)]
+        check_compiled(knowledge)
+        check_entailment(knowledge, queries)
+    print(f"{args.sentences} random sentences ok")
+
+    # The tree interpreter itself recurses, so give it room for the chain
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * args.depth + 1000))
+    symbols, chain = deep_chain(args.depth)
+    check_compiled(chain)
+    check_entailment(chain, symbols)
+    print(f"chain of depth {args.depth} ok")
+
+
+if __name__ == "__main__":
+    main()
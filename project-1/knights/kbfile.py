@@ -0,0 +1,174 @@
+"""
+Knowledge-base files: a compact JSON format for logic sentences, a
+streaming reader and writer for files of puzzles, and a command line
+solver for whole files.
+
+A sentence is written as a symbol name (a JSON string) or as a list whose
+first item names the connective:
+
+    ["not", s]  ["and", s, ...]  ["or", s, ...]
+    ["implies", antecedent, consequent]  ["iff", left, right]
+
+A puzzle file has one JSON object per line (JSON Lines):
+
+    {"name": "Puzzle 0", "knowledge": [...], "queries": ["A is a Knight", ...]}
+
+Usage: python kbfile.py puzzles.jsonl [--method batch|sat] [--workers N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import OrderedDict
+
+import logic
+import sat
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+CONNECTIVES = {
+    "not": Not,
+    "and": And,
+    "or": Or,
+    "implies": Implication,
+    "iff": Biconditional,
+}
+
+# Most recently solved puzzles remembered, so repeats skip solving
+CACHE_SIZE = 256
+
+
+def encode(sentence):
+    """
+    Returns the JSON-ready form of a sentence.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name
+    if isinstance(sentence, Not):
+        return ["not", encode(sentence.operand)]
+    if isinstance(sentence, And):
+        return ["and"] + [encode(conjunct) for conjunct in sentence.conjuncts]
+    if isinstance(sentence, Or):
+        return ["or"] + [encode(disjunct) for disjunct in sentence.disjuncts]
+    if isinstance(sentence, Implication):
+        return ["implies", encode(sentence.antecedent), encode(sentence.consequent)]
+    if isinstance(sentence, Biconditional):
+        return ["iff", encode(sentence.left), encode(sentence.right)]
+    raise TypeError(f"cannot encode {sentence!r}")
+
+
+def decode(data, symbols=None):
+    """
+    Builds a sentence from its JSON form. `symbols` optionally maps names to
+    Symbol objects already made, so they are shared across many sentences.
+    Structurally identical subsentences other than conjunctions come back
+    as the same interned node.
+    """
+    if isinstance(data, str):
+        if symbols is None:
+            return Symbol(data)
+        if data not in symbols:
+            symbols[data] = Symbol(data)
+        return symbols[data]
+    if not isinstance(data, list) or not data or data[0] not in CONNECTIVES:
+        raise ValueError(f"not a sentence: {data!r}")
+    return CONNECTIVES[data[0]](*[decode(item, symbols) for item in data[1:]])
+
+
+def read_puzzles(file):
+    """
+    Yields (name, knowledge, queries) for each puzzle in an open puzzle
+    file, one line at a time. Blank lines are skipped.
+    """
+    symbols = {}
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            knowledge = decode(record["knowledge"], symbols)
+            queries = [decode(query, symbols) for query in record["queries"]]
+        except (ValueError, KeyError, TypeError) as error:
+            raise ValueError(f"line {number}: {error}") from None
+        yield record.get("name", f"Puzzle {number}"), knowledge, queries
+
+
+def write_puzzle(file, name, knowledge, queries):
+    """
+    Writes one puzzle as a line of a puzzle file.
+    """
+    record = {
+        "name": name,
+        "knowledge": encode(knowledge),
+        "queries": [encode(query) for query in queries],
+    }
+    file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def solve(knowledge, queries, method="batch", workers=None):
+    """
+    Returns {query: entailed} using batch model checking or the SAT solver.
+    """
+    if method == "sat":
+        return {query: sat.entails(knowledge, query) for query in queries}
+    return logic.model_check_all(knowledge, queries, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a file of logic puzzles.")
+    parser.add_argument("file", help="puzzle file, one JSON puzzle per line ('-' for stdin)")
+    parser.add_argument("--method", choices=["batch", "sat"], default="batch")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for batch model checking")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print the summary")
+    args = parser.parse_args()
+
+    file = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    # Cached hashes and interned parts make repeated puzzles cheap to recognise;
+    # only the most recent are kept so memory stays flat on long files
+    solved = OrderedDict()
+    puzzles = queries_checked = 0
+    parse_time = solve_time = 0.0
+    start = time.perf_counter()
+    with file:
+        stream = read_puzzles(file)
+        while True:
+            # Time reading and solving separately
+            mark = time.perf_counter()
+            try:
+                name, knowledge, queries = next(stream)
+            except StopIteration:
+                break
+            except ValueError as error:
+                sys.exit(f"{args.file}: {error}")
+            parsed = time.perf_counter()
+            key = (knowledge, tuple(queries))
+            if key in solved:
+                solved.move_to_end(key)
+            else:
+                solved[key] = solve(knowledge, queries, args.method, args.workers)
+                if len(solved) > CACHE_SIZE:
+                    solved.popitem(last=False)
+            entailed = solved[key]
+            solve_time += time.perf_counter() - parsed
+            parse_time += parsed - mark
+
+            puzzles += 1
+            queries_checked += len(queries)
+            if not args.quiet:
+                print(name)
+                for query in queries:
+                    if entailed[query]:
+                        print(f"    {query.formula()}")
+
+    seconds = time.perf_counter() - start
+    print(f"{puzzles} puzzles, {queries_checked} queries in {seconds:.3f}s "
+          f"(parse {parse_time:.3f}s, solve {solve_time:.3f}s)", file=sys.stderr)
+    if seconds > 0:
+        print(f"{puzzles / seconds:.1f} puzzles/s, {queries_checked / seconds:.1f} queries/s",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
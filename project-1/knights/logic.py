@@ -1,16 +1,79 @@
 import itertools
+import multiprocessing
+import weakref
 
 
 class Sentence():
+    """Base class of logical sentences.
+
+    Sentences other than And are hash-consed: constructing one that is
+    structurally identical to one already alive returns that same node.
+    Nodes cache their hash and symbol set, so equality, hashing and
+    symbols() do not walk the tree, and repeated subformulas in large
+    knowledge bases are stored once. And nodes are never shared, because
+    And.add can still change them (see And)."""
+
+    __slots__ = ("_hash", "_symbols", "_interned", "__weakref__")
+
+    # Live nodes by (kind, fields); entries vanish once a node is unused
+    table = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key, **fields):
+        """Returns the node for `key`, creating it with `fields` if needed."""
+        node = Sentence.table.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(node, name, value)
+            node.cache(key)
+            object.__setattr__(node, "_interned", True)
+            Sentence.table[key] = node
+        return node
+
+    def cache(self, key):
+        """Stores the hash and symbol set of a newly built or changed node."""
+        object.__setattr__(self, "_hash", hash(key))
+        object.__setattr__(self, "_symbols", frozenset().union(
+            *[child._symbols for child in self.children()]
+        ))
+
+    def children(self):
+        """Returns the immediate subsentences."""
+        return []
+
+    @classmethod
+    def nest(cls, sentence):
+        """Validates a sentence about to become part of another one. An And
+        used this way can no longer be added to, since the caches of the
+        sentences containing it would go stale."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            object.__setattr__(sentence, "_nested", True)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """Evaluates the logical sentence in a model that may leave some
+        symbols unassigned: returns True or False if the assigned symbols
+        already decide it, otherwise None."""
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
+    def source(self, operands, index):
+        """Returns a Python expression for the sentence over a model
+        sequence `m`, given the expressions already computed for its
+        children; `index` maps symbol names to positions in `m`."""
+        raise Exception("nothing to compile")
+
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
         return set()
@@ -43,15 +106,25 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return cls.intern(("symbol", name), name=name)
 
-    def __init__(self, name):
-        self.name = name
+    def cache(self, key):
+        object.__setattr__(self, "_hash", hash(key))
+        object.__setattr__(self, "_symbols", frozenset([self.name]))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +135,42 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
+    def source(self, operands, index):
+        return f"m[{index[self.name]}]"
+
     def symbols(self):
-        return {self.name}
+        return set(self._symbols)
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.nest(operand)
+        return cls.intern(("not", operand), operand=operand)
+
+    def children(self):
+        return [self.operand]
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not)
+            and not (self._interned and other._interned)
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +178,53 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
+    def source(self, operands, index):
+        return f"not {operands[0]}"
+
     def symbols(self):
-        return self.operand.symbols()
+        return set(self._symbols)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    """Conjunction. Every And(...) is a new node of its own, since add()
+    changes it in place to build up a knowledge base, refreshing its cached
+    hash and symbols. Once an And has been used inside another sentence,
+    add() raises instead, as that sentence's caches would not follow."""
+
+    __slots__ = ("conjuncts", "_nested")
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+            Sentence.nest(conjunct)
+        node = object.__new__(cls)
+        object.__setattr__(node, "conjuncts", list(conjuncts))
+        object.__setattr__(node, "_interned", False)
+        object.__setattr__(node, "_nested", False)
+        node.cache(("and", conjuncts))
+        return node
+
+    def children(self):
+        return self.conjuncts
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And)
+            and self._hash == other._hash
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return self._hash
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +233,61 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
+        if self._nested:
+            raise Exception("cannot add to a conjunction used inside another sentence")
+        Sentence.nest(conjunct)
         self.conjuncts.append(conjunct)
+        self.cache(("and", tuple(self.conjuncts)))
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
+    def source(self, operands, index):
+        return " and ".join(operands) if operands else "True"
+
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set(self._symbols)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+            Sentence.nest(disjunct)
+        return cls.intern(("or", disjuncts), disjuncts=list(disjuncts))
+
+    def children(self):
+        return self.disjuncts
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or)
+            and not (self._interned and other._interned)
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
+
+    def __reduce__(self):
+        return (Or, tuple(self.disjuncts))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +296,54 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
+    def source(self, operands, index):
+        return " or ".join(operands) if operands else "False"
+
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set(self._symbols)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        Sentence.nest(antecedent)
+        Sentence.nest(consequent)
+        return cls.intern(("implies", antecedent, consequent),
+                          antecedent=antecedent, consequent=consequent)
+
+    def children(self):
+        return [self.antecedent, self.consequent]
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and not (self._interned and other._interned)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,46 +352,82 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
+    def source(self, operands, index):
+        antecedent, consequent = operands
+        return f"not {antecedent} or {consequent}"
+
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set(self._symbols)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        Sentence.nest(left)
+        Sentence.nest(right)
+        return cls.intern(("biconditional", left, right), left=left, right=right)
+
+    def children(self):
+        return [self.left, self.right]
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and not (self._interned and other._interned)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        # Each side evaluates to a bool, so compare them directly
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
+    def source(self, operands, index):
+        left, right = operands
+        return f"{left} == {right}"
+
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return set(self._symbols)
 
 
 def model_check(knowledge, query):
@@ -261,3 +466,149 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_incremental(knowledge, query):
+    """Checks if knowledge base entails query, like model_check, but assigns
+    symbols in one model in place (undoing each assignment on the way back)
+    and evaluates partial models in three-valued logic. A branch is pruned
+    as soon as the knowledge base is false in it, and the search stops at
+    the first model where the knowledge base holds and the query does not."""
+
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    model = dict()
+
+    def check_all(index):
+        """Checks entailment in every completion of the current partial model."""
+
+        # If knowledge base is false, no completion can be a counter-model
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return True
+
+        # Once knowledge base is true, the query decides every completion
+        if known is True:
+            answer = query.evaluate_partial(model)
+            if answer is not None:
+                return answer
+
+        # Choose the next unassigned symbol and try both values
+        p = symbols[index]
+        model[p] = True
+        entailed = check_all(index + 1)
+        if entailed:
+            model[p] = False
+            entailed = check_all(index + 1)
+        del model[p]
+        return entailed
+
+    return check_all(0)
+
+
+def compile_sentence(sentence, symbols):
+    """Compiles a sentence into a function of one model, given as a
+    sequence of truth values in the order of `symbols`. The sentence is
+    flattened into a straight-line program with one local variable per
+    subformula, children first, so evaluating it makes no recursive calls
+    or name lookups, and deep sentences compile like shallow ones."""
+    index = {name: i for i, name in enumerate(symbols)}
+
+    # Walk the tree in post-order without recursion; shared nodes (and
+    # symbols, read straight from the model) are only computed once
+    results = {}
+    lines = []
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in results:
+            continue
+        children = node.children()
+        if not expanded and children:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        expression = node.source([results[id(child)] for child in children], index)
+        if isinstance(node, Symbol):
+            results[id(node)] = expression
+        else:
+            results[id(node)] = f"t{len(lines)}"
+            lines.append(f"    t{len(lines)} = {expression}\n")
+
+    program = "def sentence(m):\n" + "".join(lines) + f"    return {results[id(sentence)]}\n"
+    namespace = {}
+    exec(compile(program, "<sentence>", "exec"), namespace)
+    return namespace["sentence"]
+
+
+def model_check_compiled(knowledge, query):
+    """Checks if knowledge base entails query, like model_check, by
+    running compiled versions of both sentences over every model."""
+
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    kb = compile_sentence(knowledge, symbols)
+    q = compile_sentence(query, symbols)
+
+    # Entailed unless some model makes knowledge true and query false
+    for model in itertools.product((False, True), repeat=len(symbols)):
+        if kb(model) and not q(model):
+            return False
+    return True
+
+
+def model_check_all(knowledge, queries, workers=None):
+    """Checks which of several queries the knowledge base entails, walking
+    the models once for all of them instead of once per query. With
+    workers > 1 the models are split by the values of the first few
+    symbols and the parts are checked on a process pool.
+    Returns a dict mapping each query to True (entailed) or False."""
+
+    queries = list(queries)
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+
+    if workers is None or workers < 2:
+        refuted = refuted_queries((knowledge, queries, symbols, ()))
+    else:
+        # Several parts per worker, so an early finish does not idle it
+        bits = min(len(symbols), (4 * workers - 1).bit_length())
+        tasks = [(knowledge, queries, symbols, prefix)
+                 for prefix in itertools.product((False, True), repeat=bits)]
+        refuted = set()
+        with multiprocessing.Pool(workers) as pool:
+            for part in pool.imap_unordered(refuted_queries, tasks):
+                refuted |= part
+                if len(refuted) == len(queries):
+                    pool.terminate()
+                    break
+
+    return {query: i not in refuted for i, query in enumerate(queries)}
+
+
+def refuted_queries(task):
+    """Returns the indices of queries that are false in some model of the
+    knowledge base, among models that begin with the given prefix of
+    symbol values. `task` is (knowledge, queries, symbols, prefix)."""
+
+    knowledge, queries, symbols, prefix = task
+    kb = compile_sentence(knowledge, symbols)
+    checks = [(i, compile_sentence(query, symbols))
+              for i, query in enumerate(queries)]
+    refuted = set()
+
+    for rest in itertools.product((False, True), repeat=len(symbols) - len(prefix)):
+        model = prefix + rest
+        if not kb(model):
+            continue
+
+        # Drop every query this model of the knowledge base refutes
+        remaining = []
+        for i, check in checks:
+            if check(model):
+                remaining.append((i, check))
+            else:
+                refuted.add(i)
+        checks = remaining
+        if not checks:
+            break
+
+    return refuted
@@ -0,0 +1,330 @@
+"""
+Entailment by satisfiability: Tseitin conversion of logic.Sentence trees to
+CNF, and a conflict-driven clause learning (CDCL) SAT solver.
+
+Literals are non-zero ints as in DIMACS: variable v is v, its negation -v.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Clauses over integer variables, with the variables of named symbols.
+
+    Each compound subformula gets its own variable, defined by clauses that
+    make it equivalent to the subformula (the Tseitin transformation), so
+    the CNF grows linearly with the sentence. Identical subformulas share a
+    variable.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.variables = {}
+        self.count = 0
+        self.literals = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """
+        Returns the variable for a named symbol.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding defining clauses.
+        """
+        # Walk the tree in post-order without recursion, so each compound
+        # subformula gets its variable after its children and deep
+        # sentences convert like shallow ones
+        results = {}
+        stack = [(sentence, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in results:
+                continue
+            if isinstance(node, Symbol):
+                results[id(node)] = self.symbol(node.name)
+                continue
+            if node in self.literals:
+                results[id(node)] = self.literals[node]
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children()))
+                continue
+            children = [results[id(child)] for child in node.children()]
+            if isinstance(node, Not):
+                results[id(node)] = -children[0]
+                continue
+            results[id(node)] = self.define(node, children)
+        return results[id(sentence)]
+
+    def define(self, sentence, children):
+        """
+        Returns a new variable for a compound sentence whose children have
+        the given literals, adding clauses that define it.
+        """
+        v = self.new_variable()
+        if isinstance(sentence, And):
+            # v => each conjunct, and all conjuncts => v
+            for child in children:
+                self.clauses.append([-v, child])
+            self.clauses.append([v] + [-child for child in children])
+        elif isinstance(sentence, Or):
+            # v => some disjunct, and each disjunct => v
+            self.clauses.append([-v] + children)
+            for child in children:
+                self.clauses.append([v, -child])
+        elif isinstance(sentence, Implication):
+            a, b = children
+            # v <=> (¬a ∨ b)
+            self.clauses += [[-v, -a, b], [v, a], [v, -b]]
+        elif isinstance(sentence, Biconditional):
+            a, b = children
+            # v <=> (a <=> b)
+            self.clauses += [[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]]
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+
+        self.literals[sentence] = v
+        return v
+
+    def assert_sentence(self, sentence, value=True):
+        """
+        Adds clauses requiring `sentence` to have the given truth value.
+        """
+        literal = self.literal(sentence)
+        self.clauses.append([literal if value else -literal])
+
+
+class Solver():
+    """
+    CDCL SAT solver: unit propagation with two watched literals, first-UIP
+    clause learning with non-chronological backjumping, and activity-based
+    (VSIDS-style) decisions with phase saving.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.value = [0] * (count + 1)      # 1 true, -1 false, 0 unassigned
+        self.level = [0] * (count + 1)
+        self.reason = [None] * (count + 1)
+        self.phase = [-1] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.watches = {}
+        self.conflicts = 0
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def literal_value(self, literal):
+        value = self.value[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """
+        Adds an input clause at decision level 0.
+        """
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            value = self.literal_value(clause[0])
+            if value == -1:
+                self.unsatisfiable = True
+            elif value == 0:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.value[variable] = 1 if literal > 0 else -1
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses. Returns a conflicting
+        clause, or None. An implied literal is always clause[0] of its reason.
+        """
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false_literal, [])
+            kept = []
+            conflict = None
+            for clause in watching:
+                if conflict is not None:
+                    kept.append(clause)
+                    continue
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.literal_value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    if self.literal_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.literal_value(clause[0]) == -1:
+                        conflict = clause
+                    else:
+                        self.assign(clause[0], clause)
+            self.watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Resolves the conflict back to the first unique implication point.
+        Returns the learnt clause (asserting literal first, then the literal
+        from the highest remaining level) and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                variable = abs(q)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.activity[variable] += self.bump
+                if self.level[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(q)
+
+            # Step back along the trail to the next literal to resolve on
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+        highest = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def backjump(self, level):
+        """
+        Undoes every assignment above the given decision level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = self.value[variable]
+            self.value[variable] = 0
+            self.reason[variable] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        best, best_activity = None, -1.0
+        for variable in range(1, self.count + 1):
+            if self.value[variable] == 0 and self.activity[variable] > best_activity:
+                best, best_activity = variable, self.activity[variable]
+        return best
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable (leaving a model in
+        self.value), otherwise False.
+        """
+        if self.unsatisfiable:
+            return False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_limits:
+                    self.unsatisfiable = True
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.assign(learnt[0], learnt)
+                # Decay old activity by growing the bump for new conflicts
+                self.bump *= 1.05
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable * self.phase[variable], None)
+
+    def model(self, variables):
+        """
+        Returns {name: bool} for the named variables after a successful solve.
+        """
+        return {name: self.value[v] == 1 for name, v in variables.items()}
+
+
+def satisfiable(sentence):
+    """
+    Returns a model {symbol name: bool} satisfying the sentence, or None.
+    """
+    cnf = CNF()
+    cnf.assert_sentence(sentence)
+    solver = Solver(cnf.count, cnf.clauses)
+    if not solver.solve():
+        return None
+    return solver.model(cnf.variables)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by showing that
+    knowledge ∧ ¬query has no satisfying model. Gives the same answers
+    as logic.model_check.
+    """
+    cnf = CNF()
+    cnf.assert_sentence(knowledge, True)
+    cnf.assert_sentence(query, False)
+    return not Solver(cnf.count, cnf.clauses).solve()
@@ -1,4 +1,5 @@
 import itertools
+import math
 import random
 
 
@@ -145,11 +146,12 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8):
 
-        # Set initial height and width
+        # Set initial height and width, and the number of mines in the game
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -158,8 +160,21 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, by id, with an index
+        # from each cell to the ids of the sentences containing it and from
+        # each (cells, count) pair to its sentence id, so a sentence is
+        # never stored twice
+        self.sentences = {}
+        self.cell_index = {}
+        self.signatures = {}
+        self.next_id = 0
+
+        # Ids of sentences added or changed since inference last saw them
+        self.pending = set()
+
+        # Mine configuration counts of frontier components, by the
+        # signatures of their sentences, reused while a component is unchanged
+        self.component_cache = {}
 
         # create new set representing board:
         self.board = set()
@@ -167,14 +182,22 @@ class MinesweeperAI():
             for j in range(self.width):
                 self.board.add((i,j))
 
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return list(self.sentences.values())
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        # Only the sentences containing the cell need updating
+        for sentence_id in self.cell_index.pop(cell, set()):
+            self.update_sentence(sentence_id, lambda sentence: sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
@@ -182,8 +205,50 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        for sentence_id in self.cell_index.pop(cell, set()):
+            self.update_sentence(sentence_id, lambda sentence: sentence.mark_safe(cell))
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence to knowledge unless it is empty or already known,
+        and queues it for inference.
+        """
+        signature = (frozenset(cells), count)
+        if not cells or signature in self.signatures:
+            return
+        sentence_id = self.next_id
+        self.next_id += 1
+        self.sentences[sentence_id] = Sentence(cells, count)
+        self.signatures[signature] = sentence_id
+        for cell in cells:
+            self.cell_index.setdefault(cell, set()).add(sentence_id)
+        self.pending.add(sentence_id)
+
+    def update_sentence(self, sentence_id, change):
+        """
+        Applies `change` to a sentence, keeping the signature index in step.
+        Sentences left empty, or identical to another sentence, are dropped;
+        otherwise the sentence is queued for inference again.
+        """
+        sentence = self.sentences[sentence_id]
+        del self.signatures[(frozenset(sentence.cells), sentence.count)]
+        change(sentence)
+
+        signature = (frozenset(sentence.cells), sentence.count)
+        if not sentence.cells or signature in self.signatures:
+            self.remove_sentence(sentence_id)
+        else:
+            self.signatures[signature] = sentence_id
+            self.pending.add(sentence_id)
+
+    def remove_sentence(self, sentence_id):
+        """
+        Drops a sentence whose signature is already out of the index.
+        """
+        sentence = self.sentences.pop(sentence_id)
+        for cell in sentence.cells:
+            self.cell_index[cell].discard(sentence_id)
+        self.pending.discard(sentence_id)
 
     def add_knowledge(self, cell, count):
         """
@@ -235,73 +300,52 @@ class MinesweeperAI():
         count_mines = count - len(neighbour_mines)
         
         # Add a new sentence to knowledge containing the neighbouring cells and count of mines
-        self.knowledge.append(Sentence(cells, count_mines))
-
-        # 4) mark any additional cells as safe or as mines if it can be concluded based on the AI's knowledge base
-        safe_cells = set()
-        mine_cells = set()
+        self.add_sentence(cells, count_mines)
 
-        for sentence in self.knowledge:
-            safe_cells.update(sentence.known_safes())
-            mine_cells.update(sentence.known_mines())
-        
-        # Update knowledge base
-        for cell in safe_cells:
-            self.mark_safe(cell)
-        
-        for cell in mine_cells:
-            self.mark_mine(cell)
-
-        # 5) add any new sentences to the AI's knowledge base if they can be inferred from existing knowledge
+        # 4) and 5) mark cells as safe or as mines and add inferred sentences,
+        # until nothing more can be concluded
         self.infer_new_knowledge()
-        
+
     def infer_new_knowledge(self):
         """
         Called by add_knowledge method
-        iterates over sentences in knowledge and checks if any new mines
-        or safes can be identified or any new sentences inferred
-        """
-
-        safe_cells = set()
-        mine_cells = set()
-        new_sentences = []
-
-        for sentence in self.knowledge:
-            # check each sentance against others
-            for comparator in self.knowledge:
-                # check if sentence is a subset of comparator
-                if sentence.cells.issubset(comparator.cells):
-                    new_sentence = comparator.cells.difference(sentence.cells)
-                    mines = comparator.count - sentence.count
-                    if mines == 0:
-                        for cell in new_sentence:
-                            safe_cells.add(cell)
-                    elif len(new_sentence) == mines:
-                        for cell in new_sentence:
-                            mine_cells.add(cell)
-                    else:
-                        new_sentences.append(Sentence(new_sentence, mines))
-                # check if comparator is a subset of sentence
-                elif comparator.cells.issubset(sentence.cells):
-                    new_sentence = sentence.cells.difference(comparator.cells)
-                    mines = sentence.count - comparator.count
-                    if mines == 0:
-                        for cell in new_sentence:
-                            safe_cells.add(cell)
-                    elif len(new_sentence) == mines:
-                        for cell in new_sentence:
-                            mine_cells.add(cell)
-                    else:
-                        new_sentences.append(Sentence(new_sentence, mines))
-
-        # Update knowledge base
-        for cell in safe_cells:
-            self.mark_safe(cell)
-        
-        for cell in mine_cells:
-            self.mark_mine(cell)
-        
-        self.knowledge.extend(new_sentences)
+        runs inference to a fixed point over a worklist of sentences that
+        are new or have changed. A sentence whose cells are all safe or all
+        mines resolves those cells; otherwise it is compared only with the
+        sentences sharing a cell with it, and the difference of any subset
+        pair is added as a new sentence.
+        """
+        while self.pending:
+            sentence_id = self.pending.pop()
+            sentence = self.sentences[sentence_id]
+
+            # Resolve sentences that decide every cell in them
+            if sentence.count == 0:
+                for cell in list(sentence.cells):
+                    self.mark_safe(cell)
+                continue
+            if len(sentence.cells) == sentence.count:
+                for cell in list(sentence.cells):
+                    self.mark_mine(cell)
+                continue
+
+            # Subset inference against the sentences that overlap this one
+            overlapping = set()
+            for cell in sentence.cells:
+                overlapping.update(self.cell_index[cell])
+            overlapping.discard(sentence_id)
+
+            for other_id in overlapping:
+                # Earlier steps in this loop may have changed either sentence
+                if sentence_id not in self.sentences:
+                    break
+                other = self.sentences.get(other_id)
+                if other is None:
+                    continue
+                if other.cells < sentence.cells:
+                    self.add_sentence(sentence.cells - other.cells, sentence.count - other.count)
+                elif sentence.cells < other.cells:
+                    self.add_sentence(other.cells - sentence.cells, other.count - sentence.count)
 
     def make_safe_move(self):
         """
@@ -321,14 +365,199 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Chooses among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        the one least likely to be a mine, breaking ties randomly.
         """
+        probabilities = self.mine_probabilities()
+        if not probabilities:
+            return None
+
+        lowest = min(probabilities.values())
+        best = [cell for cell, p in probabilities.items() if p - lowest < 1e-12]
+        return random.choice(best)
 
-        # choose a random cell amongst unknowns
+    def frontier_components(self):
+        """
+        Splits the sentences in knowledge into groups that share no cells.
+        Returns a list of (sentence signatures, cells) per group, the cells
+        in breadth-first order so that sentences are completed early when
+        the group is enumerated.
+        """
+        components = []
+        seen = set()
+        for start_id in self.sentences:
+            if start_id in seen:
+                continue
+            seen.add(start_id)
+            queue = [start_id]
+            cells = []
+            placed = set()
+            for sentence_id in queue:
+                for cell in sorted(self.sentences[sentence_id].cells):
+                    if cell in placed:
+                        continue
+                    placed.add(cell)
+                    cells.append(cell)
+                    for other_id in self.cell_index[cell]:
+                        if other_id not in seen:
+                            seen.add(other_id)
+                            queue.append(other_id)
+            signatures = frozenset(
+                (frozenset(self.sentences[i].cells), self.sentences[i].count) for i in queue
+            )
+            components.append((signatures, cells))
+        return components
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each unknown cell is a mine, over all
+        mine layouts consistent with knowledge and the total mine count,
+        each layout equally likely.
+
+        Cells in sentences (the frontier) are enumerated per component, and
+        components are combined by how many mines they use: a combination
+        of frontier layouts using t mines is weighted by the number of ways
+        to place the other mines among the cells outside the frontier.
+        """
         unknowns = self.board.difference(self.moves_made, self.mines)
-        if unknowns:
-            return random.choice(list(unknowns))
-        else:
-            return None
\ No newline at end of file
+        if not unknowns:
+            return {}
+
+        # Count layouts of each frontier component, reusing earlier counts
+        components = self.frontier_components()
+        cache = {}
+        counts = []
+        frontier = set()
+        for signatures, cells in components:
+            if signatures not in self.component_cache:
+                self.component_cache[signatures] = enumerate_component(signatures, cells)
+            cache[signatures] = self.component_cache[signatures]
+            counts.append(cache[signatures])
+            frontier.update(cells)
+        self.component_cache = cache
+
+        # Known safe cells not yet chosen cannot hold any of the mines
+        interior = [cell for cell in unknowns if cell not in frontier and cell not in self.safes]
+        mines_left = self.total_mines - len(self.mines)
+
+        count_mines = True
+
+        def ways(total):
+            """Weight of frontier layouts with `total` mines in all."""
+            if not count_mines:
+                return 1
+            outside = mines_left - total
+            if outside < 0 or outside > len(interior):
+                return 0
+            return math.comb(len(interior), outside)
+
+        # Mine totals of every component but one, from prefix and suffix
+        # convolutions of the per-component totals
+        totals = [{m: count for m, (count, _) in layouts.items()} for layouts in counts]
+        prefix = [{0: 1}]
+        for distribution in totals:
+            prefix.append(convolve(prefix[-1], distribution))
+        suffix = [{0: 1}]
+        for distribution in reversed(totals):
+            suffix.append(convolve(suffix[-1], distribution))
+        suffix.reverse()
+
+        everything = prefix[-1]
+        total_weight = sum(count * ways(t) for t, count in everything.items())
+        if total_weight == 0:
+            # The mine count does not fit the knowledge; ignore it
+            count_mines = False
+            total_weight = sum(everything.values())
+
+        probabilities = {cell: 0.0 for cell in unknowns & self.safes}
+        for index, layouts in enumerate(counts):
+            others = convolve(prefix[index], suffix[index + 1])
+            mine_weight = {}
+            for m, (_, cell_counts) in layouts.items():
+                weight = sum(count * ways(m + t) for t, count in others.items())
+                for cell, count in cell_counts.items():
+                    mine_weight[cell] = mine_weight.get(cell, 0) + count * weight
+            for cell in mine_weight:
+                probabilities[cell] = mine_weight[cell] / total_weight
+
+        if interior:
+            # Every interior cell is equally likely to hold the mines left over
+            expected = sum(count * ways(t) * (mines_left - t)
+                           for t, count in everything.items()) / total_weight
+            for cell in interior:
+                probabilities[cell] = min(1.0, max(0.0, expected / len(interior)))
+        return probabilities
+
+
+def convolve(a, b):
+    """
+    Combines two {mines: count} distributions of independent cell groups.
+    """
+    result = {}
+    for m, count in a.items():
+        for n, other in b.items():
+            result[m + n] = result.get(m + n, 0) + count * other
+    return result
+
+
+def enumerate_component(signatures, cells):
+    """
+    Counts the mine layouts of a group of cells that satisfy every sentence
+    in it. Returns {mines: (layouts, {cell: layouts with a mine there})}.
+
+    Cells are assigned in order by backtracking, abandoning a branch once a
+    sentence has too many or too few mines possible. Results for the rest of
+    the cells are memoized by position and the mines still needed by the
+    sentences that are partly assigned, since that is all they depend on.
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+    sentences = [(sorted(position[cell] for cell in group), count)
+                 for group, count in signatures]
+
+    # Sentences containing each cell, and those open before each position
+    containing = [[] for _ in cells]
+    for s, (members, _) in enumerate(sentences):
+        for i in members:
+            containing[i].append(s)
+    open_at = [[s for s, (members, _) in enumerate(sentences) if members[0] < i <= members[-1]]
+               for i in range(len(cells) + 1)]
+
+    need = [count for _, count in sentences]
+    left = [len(members) for members, _ in sentences]
+    memo = {}
+
+    def solve(i):
+        """Returns {mines: (layouts, [mine layouts per cell from i on])}."""
+        if i == len(cells):
+            return {0: (1, [])}
+        key = (i, tuple(need[s] for s in open_at[i]))
+        if key in memo:
+            return memo[key]
+
+        result = {}
+        for mine in (0, 1):
+            feasible = True
+            for s in containing[i]:
+                need[s] -= mine
+                left[s] -= 1
+                if need[s] < 0 or need[s] > left[s]:
+                    feasible = False
+            if feasible:
+                for m, (count, per_cell) in solve(i + 1).items():
+                    total, cell_counts = result.get(m + mine, (0, None))
+                    here = [count if mine else 0] + per_cell
+                    if cell_counts is None:
+                        cell_counts = here
+                    else:
+                        cell_counts = [x + y for x, y in zip(cell_counts, here)]
+                    result[m + mine] = (total + count, cell_counts)
+            for s in containing[i]:
+                need[s] += mine
+                left[s] += 1
+
+        memo[key] = result
+        return result
+
+    return {m: (count, dict(zip(cells, per_cell))) for m, (count, per_cell) in solve(0).items()}